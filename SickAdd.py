@@ -9,6 +9,36 @@
 #
 #
 # Changelog
+# Version 3.3
+# - Classifies unknown IMDb IDs concurrently, the number of workers is set with --imdb_workers
+# - All outbound requests share one pooled HTTP session with timeouts, retries and jittered backoff
+# - Unchanged IMDb watchlists are skipped using conditional requests and a content hash stored in the database
+# - Each watchlist and the SickChill show list are only downloaded once per run
+# - Database writes are grouped in one transaction per step, and the database uses WAL journaling
+# - Series already in SickChill are reconciled with a single set-based UPDATE
+# - Failed TheTVDB lookups are retried on an exponential schedule, --refresh_tvdb forces a new lookup
+# - The debug log is written by a background thread, rotated log files are compressed off the main thread
+# - A lock file next to the database prevents two runs from overlapping
+# - IMDb title pages are streamed and the download stops as soon as the title has been read
+# - Only the list items of IMDb watchlists are extracted, and watchlists spanning several pages are followed page by page
+# - Titles typed by the structured data of watchlist pages are classified without fetching their title page
+# - The database schema is versioned with PRAGMA user_version, and the database is opened once per run
+# - TheTVDB responses are parsed with the standard library XML parser, requests is imported with the first HTTP request
+# - Requests are rate limited per host, slowing down when a host throttles them and honoring Retry-After
+# - Throttled title pages and TheTVDB lookups are retried on the next run instead of being stored as negatives
+# - A watchlist that can't be fetched is skipped instead of stopping the run
+# - A configuration file (--config) can define tenants, each with their own watchlists and SickChill, sharing the IMDb
+#   classification and TheTVDB lookups while tracking which series were added to the SickChill of each tenant
+# - Series are submitted to SickChill concurrently (--sickchill_workers), each failed addition is retried with a growing
+#   delay and its attempts and last error are stored
+# - Adaptive polling (--adaptive_polling) polls each watchlist less often while its IMDb IDs don't change
+# - Chunked mode (--chunk_size) processes very large watchlists with a memory use that doesn't grow with their size
+# - Pipeline mode (--pipeline) adds each new series to SickChill as soon as it is found, through bounded queues between the steps
+# - --showdb streams its output, can be filtered and paged, and exports JSON or CSV with --format
+# - Classifications, TheTVDB lookups and SickChill additions are checkpointed as they complete, a restarted run resumes
+#   an interrupted one without repeating them
+# - Each run writes a JSON report with per-phase timings and per-host request counters, and optionally a Prometheus textfile
+#
 # Version 3.2
 # - Now stores all IDs from IMDb watchlists with a new show_type db field to differentiate TV shows
 # - Dramatically reduces the number of requests to IMDb by ignoring any known IMDb ID
@@ -30,10 +60,38 @@ settings = {
     ],
     "sickchill_url": "http://sickchill_ip:port",
     "sickchill_api_key": "your_sickchill_api_key",
+    "imdb_url": "https://www.imdb.com",
+    "thetvdb_url": "https://thetvdb.com",
     "database_path": "",
     "debug_log_path": "",
     "debug": 1,
-    "debug_max_size_mb": "20"
+    "debug_max_size_mb": "20",
+    "imdb_workers": 8,
+    "http_connect_timeout": 10,
+    "http_read_timeout": 30,
+    "http_retries": 3,
+    "http_backoff": 1,
+    "http_rate_limit": 10,
+    "http_rate_burst": 10,
+    "http_max_retry_after": 120,
+    "database_journal_mode": "WAL",
+    "tvdb_retry_min_hours": 24,
+    "tvdb_retry_max_hours": 720,
+    "sickchill_workers": 4,
+    "sickchill_retry_min_hours": 1,
+    "sickchill_retry_max_hours": 168,
+    "watchlist_max_pages": 100,
+    "adaptive_polling": 0,
+    "watchlist_poll_min_minutes": 60,
+    "watchlist_poll_max_minutes": 10080,
+    "checkpoint_interval": 1,
+    "chunk_size": 0,
+    "tenants": [],
+    "tenant_watchlist_urls": [],
+    "pipeline": 0,
+    "pipeline_queue_size": 100,
+    "report_path": "",
+    "prometheus_textfile_path": ""
 }
 
 
@@ -42,21 +100,85 @@ settings = {
 import sys
 import argparse
 import sqlite3
-import requests
-from bs4 import BeautifulSoup
 import json
-from datetime import datetime
+import csv
+from datetime import datetime, timedelta, timezone
 import os
 import html
 import time
 import re
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
 import gzip
+import atexit
+import logging
+import logging.handlers
+import queue
+import shutil
+import hashlib
+import random
+import threading
+import bisect
+import xml.etree.ElementTree as ElementTree
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+try:
+    import fcntl
+except ImportError:
+    # File locking is not available on Windows
+    fcntl = None
+
+# requests is imported with the first HTTP session, so --showdb and --delete start without loading it
+requests = None
+
+########## LOGGING SECTION #######
+logger = logging.getLogger("sickadd")
+log_listener = None
+log_lock = threading.Lock()
+
+# Compress a rotated log file and remove the uncompressed copy
+def compress_log_file(log_file_path):
+    with open(log_file_path, "rb") as input_file, gzip.open(log_file_path + ".gz", "wb") as output_file:
+        shutil.copyfileobj(input_file, output_file)
+    os.remove(log_file_path)
+
+# Log file handler writing through a buffered stream, rotating by rename and compressing rotated files in the background
+class LogFileHandler(logging.handlers.RotatingFileHandler):
+    def __init__(self, filename, log_queue, max_bytes=0):
+        super().__init__(filename, maxBytes=max_bytes, delay=True)
+        self.log_queue = log_queue
+
+    # Only flush the stream once the writer thread has caught up with the queue
+    def flush(self):
+        if self.stream and self.log_queue.empty():
+            self.stream.flush()
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename):
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            rotated_file_path = f"{self.baseFilename}_{timestamp}.log"
+            suffix = 1
+            while os.path.exists(rotated_file_path) or os.path.exists(rotated_file_path + ".gz"):
+                rotated_file_path = f"{self.baseFilename}_{timestamp}_{suffix}.log"
+                suffix += 1
+            os.rename(self.baseFilename, rotated_file_path)
+            try:
+                threading.Thread(target=compress_log_file, args=(rotated_file_path,), name="sickadd-log-compress").start()
+            except RuntimeError:
+                # Threads can't be started during interpreter shutdown
+                compress_log_file(rotated_file_path)
+
+# Configure logging from the settings: console output is written synchronously, the log file by a background writer thread
+def setup_logging(console_stream=None):
+    global log_listener
+    with log_lock:
+        if log_listener is not None:
+            log_listener.stop()
+            for handler in log_listener.handlers:
+                handler.close()
 
-def debug_log(message, level=1, force=False):
-    if settings["debug"] >= level or force:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-        log_message = f"[{timestamp}] {message}"
-        print(log_message)
         log_file_path = settings["debug_log_path"]
 
         # Set a default log file name if the path is empty
@@ -68,41 +190,377 @@ def debug_log(message, level=1, force=False):
         if directory_path:
             os.makedirs(directory_path, exist_ok=True)
 
-        # Check the log file size and compress it if necessary
         try:
-            max_size_bytes = float(settings["debug_max_size_mb"]) * 1024 * 1024
+            max_size_bytes = int(float(settings["debug_max_size_mb"]) * 1024 * 1024)
         except (ValueError, TypeError):
-            max_size_bytes = None
-
-        if max_size_bytes and os.path.exists(log_file_path) and os.path.getsize(log_file_path) > max_size_bytes:
-            backup_file_path = f"sickadd.log_{timestamp}.log"
-            with open(log_file_path, "rb") as input_file, gzip.open(backup_file_path + ".gz", "wb") as output_file:
-                output_file.writelines(input_file)
-            os.remove(log_file_path)
-            with open(log_file_path, "w") as log_file:
-                log_file.write(log_message + "\n")
+            max_size_bytes = 0
+
+        formatter = logging.Formatter("[%(asctime)s] %(message)s", "%Y%m%d_%H%M")
+        console_handler = logging.StreamHandler(console_stream or sys.stdout)
+        console_handler.setFormatter(formatter)
+        log_queue = queue.SimpleQueue()
+        file_handler = LogFileHandler(log_file_path, log_queue, max_size_bytes)
+        file_handler.setFormatter(formatter)
+
+        logger.handlers = [console_handler, logging.handlers.QueueHandler(log_queue)]
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        log_listener = logging.handlers.QueueListener(log_queue, file_handler)
+        log_listener.start()
+
+# Write all pending log messages to the log file
+def stop_logging():
+    global log_listener
+    with log_lock:
+        if log_listener is not None:
+            log_listener.stop()
+            for handler in log_listener.handlers:
+                handler.close()
+            log_listener = None
+
+atexit.register(stop_logging)
+
+# Log a message if its level is enabled, the message is only formatted with args once it is known to be logged
+def debug_log(message, *args, level=1, force=False):
+    if settings["debug"] >= level or force:
+        if log_listener is None:
+            setup_logging()
+        logger.info(message, *args)
+
+
+########## HTTP CLIENT SECTION #######
+# HTTP status codes considered transient and worth retrying
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Status codes of responses asking the client to slow down
+THROTTLED_STATUS_CODES = (429, 503)
+
+# Lowest request rate per second the rate limiter slows down to, and the rate regained after each successful request
+MIN_RATE_LIMIT = 0.1
+RATE_LIMIT_INCREASE = 0.1
+
+# Raised when a request is still throttled after all retries, the request must be tried again on a later run
+class ThrottledError(Exception):
+    pass
+
+# Token bucket limiting the request rate to a host. The rate is halved each time the host throttles a request,
+# and increases back to the configured rate by small steps after each successful request (AIMD)
+# A rate of 0 disables the limit, only the Retry-After delays sent by the host are then applied
+class HostRateLimiter:
+    def __init__(self, rate, burst):
+        self.lock = threading.Lock()
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    # Wait until a request can be sent to the host
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if self.rate:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif not self.rate:
+                    return
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self, retry_after=None):
+        with self.lock:
+            if self.rate:
+                self.rate = max(self.rate / 2, MIN_RATE_LIMIT)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def succeeded(self):
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + RATE_LIMIT_INCREASE)
+
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+
+# Return the rate limiter of the host of a URL, shared by all the requests sent to the host
+def get_rate_limiter(url):
+    host = urlsplit(url).netloc
+    with rate_limiters_lock:
+        if host not in rate_limiters:
+            rate_limiters[host] = HostRateLimiter(float(settings["http_rate_limit"]), float(settings["http_rate_burst"]))
+        return rate_limiters[host]
+
+# Return the delay in seconds requested by the Retry-After header of a response, None if there is none
+def get_retry_after(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        retry_after = float(value)
+    except ValueError:
+        # Retry-After dates are rare, the email package is only loaded for them
+        from email.utils import parsedate_to_datetime
+        try:
+            retry_after = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(retry_after, 0), float(settings["http_max_retry_after"]))
+
+http_session = None
+http_session_lock = threading.Lock()
+
+# Return the HTTP session shared by all outbound calls, connections are pooled and kept alive per host
+def get_http_session():
+    global http_session, requests
+    with http_session_lock:
+        if http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            try:
+                pool_size = max(10, int(settings["imdb_workers"]), int(settings["sickchill_workers"]))
+            except (KeyError, ValueError, TypeError):
+                pool_size = 10
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            http_session = session
+    return http_session
+
+# Perform a GET request with connect/read timeouts, within the rate limit of the host,
+# retrying with jittered exponential backoff on 429 and 5xx responses and connection errors
+def http_get(url, headers=None, **kwargs):
+    timeout = (float(settings["http_connect_timeout"]), float(settings["http_read_timeout"]))
+    retries = int(settings["http_retries"])
+    backoff = float(settings["http_backoff"])
+    session = get_http_session()
+    rate_limiter = get_rate_limiter(url)
+
+    for attempt in range(retries + 1):
+        retry_after = None
+        rate_limiter.acquire()
+        start_time = time.perf_counter()
+        try:
+            response = session.get(url, headers=headers, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            run_metrics.record_request(url, time.perf_counter() - start_time)
+            if attempt >= retries:
+                raise
+            debug_log("Request error for URL: %s - %s - Retry %s/%s", url, e, attempt + 1, retries)
         else:
-            with open(log_file_path, "a") as log_file:
-                log_file.write(log_message + "\n")
-
-
+            # The size of streamed responses is recorded by their reader
+            size = 0 if kwargs.get("stream") else len(response.content)
+            run_metrics.record_request(url, time.perf_counter() - start_time, response.status_code, size)
+            if response.status_code in THROTTLED_STATUS_CODES:
+                retry_after = get_retry_after(response)
+                rate_limiter.throttled(retry_after)
+            else:
+                rate_limiter.succeeded()
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                return response
+            response.close()
+            debug_log("Request failed for URL: %s - Response code: %s - Retry %s/%s", url, response.status_code, attempt + 1, retries)
+        run_metrics.record_retry(url)
+
+        # The rate limiter makes the next request wait for the delay requested by the host
+        if retry_after is None:
+            delay = backoff * (2 ** attempt)
+            time.sleep(delay / 2 + random.uniform(0, delay / 2))
+
+# Responses fetched by the preflight checks, reused by the processing steps of the same run
+run_responses = {}
+
+########## METRICS SECTION #######
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Timings and counters of a run: duration and rows touched per phase, requests, bytes, latency and retries per host
+class RunMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+        self.end_time = None
+        self.success = False
+        self.current_phase = None
+        self.phases = {}
+        self.hosts = {}
+        # Called with the name of each phase when it starts
+        self.on_phase_start = None
+
+    # Time a phase of the run, requests and rows are also counted per phase
+    @contextmanager
+    def phase(self, name):
+        self.current_phase = name
+        if self.on_phase_start is not None:
+            self.on_phase_start(name)
+        phase = self.phases.setdefault(name, {"seconds": 0.0, "requests": 0, "rows": 0})
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            phase["seconds"] += time.perf_counter() - start_time
+            self.current_phase = None
+            debug_log("Phase %s completed in %.3f seconds", name, phase["seconds"])
+
+    def get_host(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = {"requests": 0, "bytes": 0, "retries": 0, "errors": 0, "latency_sum": 0.0, "latency_buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+        return self.hosts[host]
+
+    def record_request(self, url, seconds, status_code=None, size=0):
+        with self.lock:
+            host = self.get_host(url)
+            host["requests"] += 1
+            host["bytes"] += size
+            host["latency_sum"] += seconds
+            host["latency_buckets"][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            if status_code is None or status_code >= 400:
+                host["errors"] += 1
+            if self.current_phase is not None:
+                self.phases[self.current_phase]["requests"] += 1
+
+    def record_bytes(self, url, size):
+        with self.lock:
+            self.get_host(url)["bytes"] += size
+
+    def record_retry(self, url):
+        with self.lock:
+            self.get_host(url)["retries"] += 1
+
+    def add_rows(self, count):
+        if self.current_phase is not None:
+            self.phases[self.current_phase]["rows"] += max(count, 0)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "start_time": datetime.fromtimestamp(self.start_time).strftime("%Y-%m-%d %H:%M:%S"),
+                "duration_seconds": round((self.end_time or time.time()) - self.start_time, 3),
+                "success": self.success,
+                "phases": {name: dict(phase, seconds=round(phase["seconds"], 3)) for name, phase in self.phases.items()},
+                "hosts": {
+                    name: dict(host, latency_sum=round(host["latency_sum"], 3), latency_buckets=dict(zip([str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"], host["latency_buckets"])))
+                    for name, host in self.hosts.items()
+                },
+            }
+
+    # Format the metrics for the Prometheus node exporter textfile collector
+    def to_prometheus(self):
+        report = self.to_dict()
+        lines = [
+            "# HELP sickadd_run_duration_seconds Duration of the last SickAdd run.",
+            "# TYPE sickadd_run_duration_seconds gauge",
+            f"sickadd_run_duration_seconds {report['duration_seconds']}",
+            "# HELP sickadd_run_success Whether the last SickAdd run completed.",
+            "# TYPE sickadd_run_success gauge",
+            f"sickadd_run_success {int(report['success'])}",
+            "# HELP sickadd_run_timestamp_seconds Start time of the last SickAdd run.",
+            "# TYPE sickadd_run_timestamp_seconds gauge",
+            f"sickadd_run_timestamp_seconds {int(self.start_time)}",
+        ]
+        for metric, key, help_text in (
+            ("sickadd_phase_duration_seconds", "seconds", "Duration of each phase of the last run."),
+            ("sickadd_phase_requests", "requests", "HTTP requests sent during each phase of the last run."),
+            ("sickadd_phase_rows", "rows", "Database rows touched by each phase of the last run."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            lines += [f'{metric}{{phase="{name}"}} {phase[key]}' for name, phase in report["phases"].items()]
+        for metric, key, help_text in (
+            ("sickadd_http_requests", "requests", "HTTP requests sent to each host during the last run."),
+            ("sickadd_http_response_bytes", "bytes", "Response bytes read from each host during the last run."),
+            ("sickadd_http_retries", "retries", "HTTP requests retried for each host during the last run."),
+            ("sickadd_http_errors", "errors", "Failed HTTP requests for each host during the last run."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            lines += [f'{metric}{{host="{name}"}} {host[key]}' for name, host in report["hosts"].items()]
+        lines += [
+            "# HELP sickadd_http_request_duration_seconds Latency of the HTTP requests of the last run.",
+            "# TYPE sickadd_http_request_duration_seconds histogram",
+        ]
+        for name, host in report["hosts"].items():
+            cumulative_count = 0
+            for bound, count in host["latency_buckets"].items():
+                cumulative_count += count
+                lines.append(f'sickadd_http_request_duration_seconds_bucket{{host="{name}",le="{bound}"}} {cumulative_count}')
+            lines.append(f'sickadd_http_request_duration_seconds_sum{{host="{name}"}} {host["latency_sum"]}')
+            lines.append(f'sickadd_http_request_duration_seconds_count{{host="{name}"}} {host["requests"]}')
+        return "\n".join(lines) + "\n"
+
+run_metrics = RunMetrics()
+
+# Commits the outcomes written to the database as they complete, at most once per checkpoint_interval seconds,
+# so an interrupted run keeps the work done before it stopped
+class Checkpoint:
+    def __init__(self, conn):
+        self.conn = conn
+        self.interval = float(settings["checkpoint_interval"])
+        self.rows = 0
+        self.last_commit = time.monotonic()
+
+    def add(self, count=1):
+        self.rows += count
+        if self.rows and time.monotonic() - self.last_commit >= self.interval:
+            self.commit()
+
+    def commit(self):
+        if self.rows:
+            self.conn.commit()
+            run_metrics.add_rows(self.rows)
+            self.rows = 0
+        self.last_commit = time.monotonic()
+
+# Write a file atomically, so readers never see a partially written file
+def write_file_atomically(file_path, content):
+    directory_path = os.path.dirname(file_path)
+    if directory_path:
+        os.makedirs(directory_path, exist_ok=True)
+    temporary_file_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temporary_file_path, "w") as output_file:
+        output_file.write(content)
+    os.replace(temporary_file_path, file_path)
+
+# Write the JSON report and the Prometheus textfile of the run
+def write_run_report():
+    report_path = settings["report_path"]
+    if not report_path:
+        report_path = os.path.splitext(get_database_path())[0] + "_report.json"
+    try:
+        write_file_atomically(report_path, json.dumps(run_metrics.to_dict(), indent=2))
+        debug_log(f"Run report written to {report_path}")
+        if settings["prometheus_textfile_path"]:
+            write_file_atomically(settings["prometheus_textfile_path"], run_metrics.to_prometheus())
+            debug_log(f"Prometheus metrics written to {settings['prometheus_textfile_path']}")
+    except OSError as e:
+        debug_log(f"Unable to write the run report: {e}", force=True)
 
 
 # Check if IMDb Watchlists are reachable
-def check_watchlists():
+def check_watchlists(cur=None):
     # Create a list to store unreachable watchlists
     unreachable_watchlists = []
 
     # Create a list to store reachable watchlists
     reachable_watchlists = []
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
-    }
-
+    # The responses are kept for this run, so each watchlist is only downloaded once
     for url in settings["watchlist_urls"]:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
+        try:
+            response = fetch_watchlist(url, cur)
+        except requests.exceptions.RequestException as e:
+            debug_log(f"Request error for URL: {url} - {e}")
+            unreachable_watchlists.append(url)
+            continue
+        run_responses[url] = response
+        if response.status_code in (200, 304):
             reachable_watchlists.append(url)
         else:
             unreachable_watchlists.append(url)
@@ -126,8 +584,10 @@ def check_watchlists():
 def check_sickchill():
     url = f"{settings['sickchill_url']}/api/{settings['sickchill_api_key']}/?cmd=shows"
     try:
-        response = requests.get(url)
+        response = http_get(url)
         response.raise_for_status()
+        # Keep the response for this run, it is reused by get_sickchill_shows
+        run_responses[url] = response
         if not response.json().get("data"):
             debug_log("Error: SickChill API key is incorrect.")
             print("Error: SickChill API key is incorrect.")
@@ -140,9 +600,9 @@ def check_sickchill():
 
 # Check if TheTVDB is reachable
 def check_thetvdb():
-    url = "https://thetvdb.com/api/GetSeriesByRemoteID.php?imdbid=tt0257315"
+    url = f"{settings['thetvdb_url']}/api/GetSeriesByRemoteID.php?imdbid=tt0257315"
     debug_log("Testing TheTVDB availability at URL: " + url)
-    response = requests.get(url)
+    response = http_get(url)
     if response.status_code != 200:
         debug_log("Error during TheTVDB availability test at URL: " + url)
         debug_log("Response: " + str(response.status_code) + " - " + response.text)
@@ -151,8 +611,8 @@ def check_thetvdb():
     else:
         debug_log("TheTVDB is reachable.")
 
-# Create or connect to SQLite database
-def setup_database():
+# Return the path of the SQLite database
+def get_database_path():
     # Check if the database path is specified in the settings
     if "database_path" in settings:
         database_path = settings["database_path"]
@@ -163,6 +623,34 @@ def setup_database():
     if not database_path:
         database_path = "sickadd.db"
 
+    return database_path
+
+# Take an exclusive lock next to the database so two runs never overlap, returns None if another run holds it
+def acquire_run_lock():
+    database_path = get_database_path()
+    directory_path = os.path.dirname(database_path)
+    if directory_path:
+        os.makedirs(directory_path, exist_ok=True)
+
+    lock_file = open(database_path + ".lock", "w")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+    return lock_file
+
+# Release the lock taken by acquire_run_lock
+def release_run_lock(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    lock_file.close()
+
+# Create or connect to SQLite database
+def setup_database():
+    database_path = get_database_path()
+
     # Create the directory if it doesn't exist and if the directory path is not empty
     directory_path = os.path.dirname(database_path)
     if directory_path:
@@ -173,152 +661,652 @@ def setup_database():
     debug_log(f"Connected to database at: {conn}")
     cur = conn.cursor()
 
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='shows'")
-    table_exists = cur.fetchone()
+    # WAL journaling avoids rewriting the rollback journal on every commit
+    journal_mode = settings.get("database_journal_mode")
+    if journal_mode:
+        cur.execute(f"PRAGMA journal_mode={journal_mode}")
+        if journal_mode.upper() == "WAL":
+            cur.execute("PRAGMA synchronous=NORMAL")
 
-    if table_exists is None:
-        # The "shows" table doesn't exist, create the table with all fields, including "show_type"
-        debug_log("Creating the 'shows' table with all fields")
-        cur.execute(
-            """
-            CREATE TABLE shows (
-                imdb_id TEXT PRIMARY KEY,
-                title TEXT,
-                watchlist_url TEXT,
-                imdb_import_date TEXT,
-                added_to_sickchill INTEGER,
-                thetvdb_id INTEGER,
-                sc_added_date TEXT,
-                show_type INTEGER
-            )
-            """
-        )
-        conn.commit()
-    else:
-        # The "shows" table exists, check if it needs to be upgraded
-        upgrade_database(conn, cur)
+    upgrade_database(conn, cur)
 
     return conn, cur
     
 ########## DB UPGRADE SECTION #######
-# Upgrade the database structure if needed
-def upgrade_database(conn, cur):
-    cur.execute("PRAGMA table_info(shows)")
-    columns = cur.fetchall()
-    column_names = [column[1] for column in columns]
+# Return the column names of a table
+def get_table_columns(cur, table):
+    cur.execute(f"PRAGMA table_info({table})")
+    return [column[1] for column in cur.fetchall()]
+
+# Create the "shows" table, databases created before schema versioning already have it
+def migrate_create_shows(conn, cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shows (
+            imdb_id TEXT PRIMARY KEY,
+            title TEXT,
+            watchlist_url TEXT,
+            imdb_import_date TEXT,
+            added_to_sickchill INTEGER,
+            thetvdb_id INTEGER,
+            sc_added_date TEXT
+        )
+        """
+    )
 
-    # Add the 'show_type' column if it doesn't exist
-    if "show_type" not in column_names:
+# Add the 'show_type' column, existing show entries were all TV shows
+def migrate_add_show_type(conn, cur):
+    if "show_type" not in get_table_columns(cur, "shows"):
         debug_log("Upgrading the 'shows' table, adding the 'show_type' column")
         cur.execute("ALTER TABLE shows ADD COLUMN show_type INTEGER")
-        conn.commit()
-
-        # Set all existing show entries 'show_type' to 1
         cur.execute("UPDATE shows SET show_type = 1")
-        conn.commit()
         debug_log("DB Upgrade - Set all existing show show_type to 1 (TV Shows)")
 
+# Add the TheTVDB lookup bookkeeping columns
+def migrate_add_tvdb_lookup(conn, cur):
+    if "tvdb_attempts" not in get_table_columns(cur, "shows"):
+        debug_log("Upgrading the 'shows' table, adding the TheTVDB lookup columns")
+        cur.execute("ALTER TABLE shows ADD COLUMN tvdb_attempts INTEGER DEFAULT 0")
+        cur.execute("ALTER TABLE shows ADD COLUMN tvdb_last_attempt TEXT")
+        cur.execute("ALTER TABLE shows ADD COLUMN tvdb_last_outcome TEXT")
+
+# Create the "watchlist_cache" table, storing the validators of the last processed version of each watchlist
+def migrate_create_watchlist_cache(conn, cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS watchlist_cache (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT,
+            cache_date TEXT
+        )
+        """
+    )
+
+# Index the columns every phase filters on, and the TheTVDB ID the SickChill updates match on
+def migrate_add_shows_indexes(conn, cur):
+    debug_log("Upgrading the 'shows' table, adding indexes")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_shows_show_type ON shows (show_type, thetvdb_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_shows_added_to_sickchill ON shows (added_to_sickchill, show_type)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_shows_thetvdb_id ON shows (thetvdb_id)")
+
+# Create the tables of multi-tenant mode: the watchlist items and SickChill state of each tenant,
+# and the watchlists fully processed for each tenant. The "shows" table is the classification and TheTVDB cache of all tenants
+def migrate_create_tenant_tables(conn, cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tenant_shows (
+            tenant TEXT,
+            imdb_id TEXT,
+            watchlist_url TEXT,
+            imdb_import_date TEXT,
+            added_to_sickchill INTEGER DEFAULT 0,
+            sc_added_date TEXT,
+            PRIMARY KEY (tenant, imdb_id)
+        )
+        """
+    )
+    cur.execute("CREATE TABLE IF NOT EXISTS tenant_watchlists (tenant TEXT, url TEXT, PRIMARY KEY (tenant, url))")
+
+# Create the "runs" table, storing the state of each run so an interrupted run is detected by the next one
+def migrate_create_runs(conn, cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            start_date TEXT,
+            end_date TEXT,
+            status TEXT,
+            phase TEXT
+        )
+        """
+    )
+
+# Create the "watchlist_schedule" table, storing when the IMDb IDs of each watchlist last changed and when it is next due
+def migrate_create_watchlist_schedule(conn, cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS watchlist_schedule (
+            url TEXT PRIMARY KEY,
+            ids_hash TEXT,
+            last_changed TEXT,
+            last_poll TEXT,
+            next_poll TEXT
+        )
+        """
+    )
+
+# Add the columns tracking the attempts to add each series to SickChill, for all series and for each tenant
+def migrate_add_sickchill_outcome(conn, cur):
+    for table in ("shows", "tenant_shows"):
+        if "sc_attempts" not in get_table_columns(cur, table):
+            debug_log(f"Upgrading the '{table}' table, adding the SickChill outcome columns")
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN sc_attempts INTEGER DEFAULT 0")
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN sc_last_attempt TEXT")
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN sc_last_error TEXT")
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN sc_next_retry TEXT")
+
+# Schema migrations in order, the database schema version (PRAGMA user_version) is the number of migrations applied
+# New migrations must be appended to the end of the list
+MIGRATIONS = [
+    migrate_create_shows,
+    migrate_add_show_type,
+    migrate_add_tvdb_lookup,
+    migrate_create_watchlist_cache,
+    migrate_add_shows_indexes,
+    migrate_create_tenant_tables,
+    migrate_create_runs,
+    migrate_create_watchlist_schedule,
+    migrate_add_sickchill_outcome,
+]
+
+# Upgrade the database structure if needed, applying the migrations newer than the database schema version
+def upgrade_database(conn, cur):
+    cur.execute("PRAGMA user_version")
+    schema_version = cur.fetchone()[0]
+    if schema_version > len(MIGRATIONS):
+        debug_log(f"Database schema version {schema_version} is newer than this version of SickAdd ({len(MIGRATIONS)})", force=True)
+        return
+
+    for version, migration in enumerate(MIGRATIONS[schema_version:], start=schema_version + 1):
+        migration(conn, cur)
+        cur.execute(f"PRAGMA user_version={version}")
+        conn.commit()
+        debug_log(f"Database schema upgraded to version {version}")
 
+# Number of runs kept in the "runs" table
+RUNS_KEPT = 100
 
-# Retrieve IMDb IDs from a given IMDb watchlist URL
-def get_imdb_watchlists(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
-        "Accept-Language": "en-US,en;q=0.5"
-    }
+# Record the start of a run, returns its ID
+# A run still marked as running was interrupted, as runs don't overlap: its checkpointed work is resumed by this run
+def start_run_state(conn, cur):
+    cur.execute("SELECT run_id, start_date, phase FROM runs WHERE status='running'")
+    for run_id, start_date, phase in cur.fetchall():
+        debug_log("Resuming run %s started on %s, interrupted during phase %s", run_id, start_date, phase, force=True)
+    cur.execute("UPDATE runs SET status='interrupted' WHERE status='running'")
 
-    debug_log(f"Fetching watchlist content from URL: {url}")
-    response = requests.get(url, headers=headers)
+    cur.execute("INSERT INTO runs (start_date, status) VALUES (?, 'running')", (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),))
+    run_id = cur.lastrowid
+    cur.execute("DELETE FROM runs WHERE run_id<=?", (run_id - RUNS_KEPT,))
+    conn.commit()
+    return run_id
 
-    if response.status_code != 200:
-        debug_log(f"Request failed for URL: {url}")
-        exit()
+# Record the phase a run is in, committing the work checkpointed so far
+def set_run_phase(conn, cur, run_id, phase):
+    cur.execute("UPDATE runs SET phase=? WHERE run_id=?", (phase, run_id))
+    conn.commit()
+
+# Record the end of a run
+def finish_run_state(conn, cur, run_id, status):
+    cur.execute("UPDATE runs SET end_date=?, status=? WHERE run_id=?", (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), status, run_id))
+    conn.commit()
+
+
+
+# Headers sent with every request to IMDb
+IMDB_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
+    "Accept-Language": "en-US,en;q=0.5"
+}
+
+# Structured data embedded in IMDb list pages
+JSON_LD_PATTERN = re.compile(r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>', re.S)
+
+# List items of the known IMDb list page layouts, each match is the first title link of an item
+LIST_ITEM_PATTERNS = (
+    re.compile(r'<li class="ipc-metadata-list-summary-item[\s"].*?href="/title/(tt\d{5,8})', re.S),
+    re.compile(r'class="lister-item-header".*?href="/title/(tt\d{5,8})', re.S),
+)
+
+# Structured data types of list items, items of any other type are classified from their title page
+SERIES_TYPES = ("TVSeries", "TVMiniSeries")
+NON_SERIES_TYPES = ("Movie", "TVMovie", "TVEpisode", "TVSpecial", "VideoGame", "MusicVideoObject", "Short")
+
+# Links and anchors of a page, used to find the next page of a list
+LINK_TAG_PATTERN = re.compile(r'<(?:a|link)\b[^>]*>', re.S)
+NEXT_PAGE_PATTERN = re.compile(r'rel="next"|class="[^"]*(?:lister-page-next|next-page)[^"]*"')
+
+# Per watchlist page and request counters of this run
+watchlist_stats = {}
+
+# Watchlist cache entries fetched during this run, only saved once their IMDb IDs are stored in the database
+watchlist_cache_updates = {}
+
+# Watchlists polled during this run, with the hash of their IMDb IDs, or None when unchanged since the last run
+watchlist_polls = {}
+
+# Share of the time since the IMDb IDs of a watchlist last changed used as the interval until its next poll
+WATCHLIST_POLL_AGE_FACTOR = 0.5
+
+# Return the interval until the next poll of a watchlist whose IMDb IDs haven't changed for a given time,
+# between watchlist_poll_min_minutes and watchlist_poll_max_minutes
+def get_watchlist_poll_interval(unchanged_for):
+    minutes = unchanged_for.total_seconds() / 60 * WATCHLIST_POLL_AGE_FACTOR
+    return timedelta(minutes=min(max(minutes, float(settings["watchlist_poll_min_minutes"])), float(settings["watchlist_poll_max_minutes"])))
+
+# Return the watchlists of a list which are due for a poll, in the same order
+def get_due_watchlists(cur, urls):
+    cur.execute("SELECT url, next_poll FROM watchlist_schedule")
+    next_polls = dict(cur.fetchall())
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    due_urls = []
+    for url in urls:
+        if not next_polls.get(url) or next_polls[url] <= now:
+            due_urls.append(url)
+        else:
+            debug_log(f"URL: {url} - Next poll due on {next_polls[url]}")
+    debug_log(f"{len(due_urls)} of {len(urls)} watchlists are due for a poll")
+    return due_urls
+
+# Limit the watchlists of this run to those due for a poll when adaptive polling is enabled
+@contextmanager
+def due_watchlists_settings(cur):
+    saved_watchlist_urls = settings["watchlist_urls"]
+    if settings["adaptive_polling"]:
+        settings["watchlist_urls"] = get_due_watchlists(cur, saved_watchlist_urls)
+    try:
+        yield
+    finally:
+        settings["watchlist_urls"] = saved_watchlist_urls
+
+# Save the polls of this run into the watchlist schedule, a watchlist whose IMDb IDs changed is polled again after
+# watchlist_poll_min_minutes, then less and less often as long as they don't change
+# Watchlists that weren't fully processed aren't saved, they stay due
+def save_watchlist_polls(cur):
+    now = datetime.now()
+    for url, ids_hash in watchlist_polls.items():
+        if ids_hash is not None and url not in watchlist_cache_updates:
+            continue
+        cur.execute("SELECT ids_hash, last_changed FROM watchlist_schedule WHERE url=?", (url,))
+        schedule_entry = cur.fetchone()
+        last_changed = now
+        if schedule_entry and (ids_hash is None or ids_hash == schedule_entry[0]):
+            ids_hash = schedule_entry[0]
+            try:
+                last_changed = datetime.strptime(schedule_entry[1], "%Y-%m-%d %H:%M:%S")
+            except (TypeError, ValueError):
+                pass
+        next_poll = now + get_watchlist_poll_interval(now - last_changed)
+        cur.execute(
+            "INSERT OR REPLACE INTO watchlist_schedule (url, ids_hash, last_changed, last_poll, next_poll) VALUES (?, ?, ?, ?, ?)",
+            (url, ids_hash, last_changed.strftime("%Y-%m-%d %H:%M:%S"), now.strftime("%Y-%m-%d %H:%M:%S"), next_poll.strftime("%Y-%m-%d %H:%M:%S")),
+        )
+        debug_log(f"URL: {url} - IMDb IDs last changed on {last_changed:%Y-%m-%d %H:%M:%S}, next poll due on {next_poll:%Y-%m-%d %H:%M:%S}")
+    watchlist_polls.clear()
+
+# Save the watchlist cache entries of this run into the database
+def save_watchlist_cache(conn, cur):
+    cache_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cur.executemany(
+        "INSERT OR REPLACE INTO watchlist_cache (url, etag, last_modified, content_hash, cache_date) VALUES (?, ?, ?, ?, ?)",
+        [(url, etag, last_modified, content_hash, cache_date) for url, (etag, last_modified, content_hash) in watchlist_cache_updates.items()],
+    )
+    save_watchlist_polls(cur)
+    conn.commit()
+    run_metrics.add_rows(len(watchlist_cache_updates))
+    debug_log(f"Watchlist cache updated for {len(watchlist_cache_updates)} watchlists")
+    watchlist_cache_updates.clear()
+
+# Fetch a watchlist page, sending the validators of the last processed version of the watchlist
+def fetch_watchlist(url, cur=None):
+    headers = dict(IMDB_HEADERS)
+
+    cache_entry = None
+    if cur is not None:
+        cur.execute("SELECT etag, last_modified FROM watchlist_cache WHERE url=?", (url,))
+        cache_entry = cur.fetchone()
+    if cache_entry:
+        etag, last_modified = cache_entry
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    debug_log(f"Fetching watchlist content from URL: {url}")
+    return http_get(url, headers=headers)
+
+# Return the response of the first page of a watchlist, or None if IMDb answered that the watchlist is unchanged since
+# the last run or if the request failed
+def get_watchlist_response(url, cur=None):
+    # Reuse the response fetched by check_watchlists when available
+    response = run_responses.pop(url, None)
+    if response is None:
+        try:
+            response = fetch_watchlist(url, cur)
+        except requests.exceptions.RequestException as e:
+            # Skip the watchlist for this run, the other watchlists are still processed
+            debug_log(f"Request error for URL: {url} - {e} - Skipping the watchlist", force=True)
+            return None
 
-    imdb_ids = re.findall(r'tt\d{5,8}', response.text)
-    imdb_ids = list(set(imdb_ids))
-    debug_log(f"URL: {url} - Total IMDb IDs: {len(imdb_ids)}")
+    if response.status_code == 304:
+        debug_log(f"URL: {url} - Watchlist not modified since the last run")
+        watchlist_polls[url] = None
+        return None
 
-    return imdb_ids
+    # Skip the watchlist for this run, the other watchlists are still processed
+    if response.status_code != 200:
+        debug_log(f"Request failed for URL: {url} - Response code: {response.status_code} - Skipping the watchlist", force=True)
+        return None
+
+    # The fingerprint of the IMDb IDs is added once all the pages are read
+    watchlist_cache_updates[url] = (response.headers.get("ETag"), response.headers.get("Last-Modified"), None)
+    return response
+
+# Retrieve the items of a given IMDb watchlist URL as dictionaries with the imdb_id, title and title_type keys,
+# returns an empty list if the watchlist is unchanged since the last run
+def get_imdb_watchlists(url, cur=None):
+    response = get_watchlist_response(url, cur)
+    if response is None:
+        return []
+
+    items = []
+    for page_items in iter_watchlist_pages(url, response):
+        items.extend(page_items)
+    stats = watchlist_stats[url]
+    debug_log(f"URL: {url} - Total IMDb IDs: {len(items)} - Typed items: {stats['typed_items']} - Pages: {stats['pages']} - Requests: {stats['requests']} - Bytes: {stats['bytes']}")
+
+    # The page markup changes from one request to the next, the watchlist is unchanged if all its pages list the same IMDb IDs
+    cache_entry = None
+    if cur is not None and url in watchlist_polls:
+        cur.execute("SELECT content_hash FROM watchlist_cache WHERE url=?", (url,))
+        cache_entry = cur.fetchone()
+    if cache_entry and cache_entry[0] == watchlist_polls[url]:
+        debug_log(f"URL: {url} - Watchlist IMDb IDs unchanged since the last run")
+        return []
+
+    return items
+
+# Return the URL of a given page of a watchlist
+def get_watchlist_page_url(url, page):
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key != "page"]
+    query.append(("page", str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+# Parse a watchlist page, returns its list items, the URL of the next page and the total number of items if known
+# Each item is a dictionary with the imdb_id, title and title_type keys, title_type is "series", "other" or None when unknown
+def parse_watchlist_page(page_url, text):
+    items = {}
+    total_items = None
+
+    # Structured data lists the items of the page with their URL, title and type
+    for json_ld in JSON_LD_PATTERN.findall(text):
+        try:
+            data = json.loads(json_ld)
+        except ValueError:
+            continue
+        if not isinstance(data, dict) or data.get("@type") != "ItemList":
+            continue
+        total_items = data.get("numberOfItems")
+        for element in data.get("itemListElement", []):
+            item = element.get("item", element) if isinstance(element, dict) else {}
+            match = re.search(r'/title/(tt\d{5,8})', str(item.get("url", "")))
+            if match and match.group(1) not in items:
+                title = html.unescape(item["name"]) if item.get("name") else None
+                item_type = item.get("@type")
+                if item_type in SERIES_TYPES:
+                    title_type = "series"
+                elif item_type in NON_SERIES_TYPES:
+                    title_type = "other"
+                else:
+                    title_type = None
+                items[match.group(1)] = {"imdb_id": match.group(1), "title": title, "title_type": title_type}
+
+    # Otherwise look for the list items of the HTML layouts, their type is unknown
+    imdb_ids = []
+    if not items:
+        for pattern in LIST_ITEM_PATTERNS:
+            imdb_ids = pattern.findall(text)
+            if imdb_ids:
+                break
+
+    # Unknown layout, scan the whole page as a last resort
+    if not items and not imdb_ids:
+        debug_log(f"URL: {page_url} - No list items found, scanning the whole page for IMDb IDs")
+        imdb_ids = re.findall(r'tt\d{5,8}', text)
+
+    for imdb_id in imdb_ids:
+        if imdb_id not in items:
+            items[imdb_id] = {"imdb_id": imdb_id, "title": None, "title_type": None}
+
+    next_page_url = None
+    for tag in LINK_TAG_PATTERN.findall(text):
+        href = re.search(r'href="([^"]+)"', tag)
+        if href and NEXT_PAGE_PATTERN.search(tag):
+            next_page_url = urljoin(page_url, html.unescape(href.group(1)))
+            break
+
+    return list(items.values()), next_page_url, total_items
+
+# Add IMDb IDs to the fingerprint of a watchlist, the sum of the hashes of its IMDb IDs, which doesn't depend on their
+# order and is computed page by page without keeping the IMDb IDs
+def add_to_ids_fingerprint(fingerprint, imdb_ids):
+    for imdb_id in imdb_ids:
+        fingerprint = (fingerprint + int.from_bytes(hashlib.sha256(imdb_id.encode("utf-8")).digest(), "big")) % (1 << 256)
+    return fingerprint
+
+# Iterate over the pages of a watchlist starting from the response of its first page, yielding the new items of each page
+# With keep_seen_ids False, only the IMDb IDs of the previous page are kept, which skips the items repeated when the list
+# shifts between two page requests, the caller has to ignore the other duplicates
+def iter_watchlist_pages(url, response, keep_seen_ids=True):
+    stats = watchlist_stats[url] = {"pages": 0, "requests": 1, "bytes": 0, "items": 0, "typed_items": 0}
+    seen_ids = set()
+    fingerprint = 0
+    page = 1
+    page_url = url
+
+    while True:
+        items, next_page_url, total_items = parse_watchlist_page(page_url, response.text)
+        new_items = [item for item in items if item["imdb_id"] not in seen_ids]
+        if keep_seen_ids:
+            seen_ids.update(item["imdb_id"] for item in new_items)
+        else:
+            seen_ids = {item["imdb_id"] for item in items}
+        fingerprint = add_to_ids_fingerprint(fingerprint, (item["imdb_id"] for item in new_items))
+        stats["pages"] += 1
+        stats["bytes"] += len(response.content)
+        stats["items"] += len(new_items)
+        stats["typed_items"] += sum(1 for item in new_items if item["title_type"] is not None)
+        debug_log(f"URL: {page_url} - Page {page}: {len(new_items)} IMDb IDs, {len(response.content)} bytes")
+        yield new_items
+
+        # Lists without a next page link are paginated with the page parameter up to their number of items
+        if next_page_url is None and isinstance(total_items, int) and stats["items"] < total_items:
+            next_page_url = get_watchlist_page_url(url, page + 1)
+
+        # Stop when there is no next page, or when a page doesn't add any item
+        if not next_page_url or not new_items:
+            break
+        if page >= int(settings["watchlist_max_pages"]):
+            debug_log(f"URL: {url} - Maximum number of pages reached ({page})")
+            break
+
+        page += 1
+        page_url = next_page_url
+        try:
+            response = http_get(page_url, headers=IMDB_HEADERS)
+        except requests.exceptions.RequestException as e:
+            response = None
+            debug_log(f"Request error for URL: {page_url} - {e}")
+        stats["requests"] += 1
+        if response is None or response.status_code != 200:
+            debug_log(f"Request failed for URL: {page_url}")
+            # The watchlist is incomplete, make sure it is fully processed again on the next run
+            watchlist_cache_updates.pop(url, None)
+            return
+
+    # The page markup can change without the list changing, the cache and the schedule follow the IMDb IDs of the list
+    watchlist_polls[url] = f"{fingerprint:064x}"
+    if url in watchlist_cache_updates:
+        watchlist_cache_updates[url] = watchlist_cache_updates[url][:2] + (watchlist_polls[url],)
+
+# Read a streamed response in chunks until the end of its <title> element, then close the connection, returns the text read
+def read_until_title(response, chunk_size=16384):
+    content = b""
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            # Only search the new chunk, plus enough of the previous one to catch a tag split across chunks
+            search_start = max(0, len(content) - len(b"</title>"))
+            content += chunk
+            if content.find(b"</title>", search_start) != -1:
+                break
+    finally:
+        response.close()
+    run_metrics.record_bytes(response.url, len(content))
+    return content.decode(response.encoding or "utf-8", errors="replace")
 
 # Determine if an IMDb ID corresponds to a TV series or mini-series, and returns the title if it is
 def detect_imdb_tv_show(imdb_id, analyzed_items=None):
     if analyzed_items is None:
         analyzed_items = {}
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
-        "Accept-Language": "en-US,en;q=0.5"
-    }
+    series_url = f"{settings['imdb_url']}/title/{imdb_id}/"
+    debug_log("Fetching series content from URL: %s", series_url)
+    series_response = http_get(series_url, headers=IMDB_HEADERS, stream=True)
+
+    # A throttled request says nothing about the title, it must not be stored as a non-series
+    if series_response.status_code in THROTTLED_STATUS_CODES:
+        series_response.close()
+        raise ThrottledError(f"Request throttled for series URL: {series_url} - Response code: {series_response.status_code}")
 
-    series_url = f"https://www.imdb.com/title/{imdb_id}/"
-    debug_log(f"Fetching series content from URL: {series_url}")
-    series_response = requests.get(series_url, headers=headers)
+    # Neither does a server error still returned after the retries, the title is classified on a later run
+    if series_response.status_code >= 500:
+        series_response.close()
+        raise requests.exceptions.HTTPError(f"Request failed for series URL: {series_url} - Response code: {series_response.status_code}", response=series_response)
 
     if series_response.status_code == 200:
-        title_search = re.search(r'<title>(.+?)</title>', series_response.text)
+        # Only the page head is needed, stop downloading once the title has been read
+        title_search = re.search(r'<title>(.+?)</title>', read_until_title(series_response))
         if title_search:
             title = html.unescape(title_search.group(1))
-            debug_log(f"ID: {imdb_id} - Title: {title}")
+            debug_log("ID: %s - Title: %s", imdb_id, title)
             if "TV Series" in title or "TV Mini Series" in title:
                 if imdb_id not in analyzed_items:
                     analyzed_items[imdb_id] = title
-                    debug_log(f"ID: {imdb_id} - Title: {title} - Is a TV series")
+                    debug_log("ID: %s - Title: %s - Is a TV series", imdb_id, title)
                     return (True, title)
                 else:
-                    debug_log(f"ID: {imdb_id} - Title: {title} - Already analyzed")
+                    debug_log("ID: %s - Title: %s - Already analyzed", imdb_id, title)
                     return (False, title)
             else:
-                debug_log(f"ID: {imdb_id} - Title: {title} - Is not a TV series")
+                debug_log("ID: %s - Title: %s - Is not a TV series", imdb_id, title)
                 return (False, title)
         else:
-            debug_log(f"ID: {imdb_id} - Title not found")
+            debug_log("ID: %s - Title not found", imdb_id)
             return (False, "")
     else:
-        debug_log(f"Request failed for series URL: {series_url}")
+        series_response.close()
+        debug_log("Request failed for series URL: %s", series_url)
         return (False, "")
 
+# Classify IMDb IDs concurrently, returns a dictionary of imdb_id: (is_tv_series, title)
+# IMDb IDs whose title page couldn't be fetched (throttled, server error or connection error) are left out, to be
+# classified on a later run, a title page that doesn't exist classifies its IMDb ID as not a TV series
+# on_classified is called in the calling thread with each IMDb ID and its classification as soon as it completes
+def classify_imdb_ids(imdb_ids, on_classified=None):
+    classifications = {}
+    if not imdb_ids:
+        return classifications
+
+    try:
+        max_workers = max(1, int(settings["imdb_workers"]))
+    except (KeyError, ValueError, TypeError):
+        max_workers = 1
+
+    debug_log(f"Classifying {len(imdb_ids)} IMDb IDs using {max_workers} workers")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(detect_imdb_tv_show, imdb_id): imdb_id for imdb_id in imdb_ids}
+        for future in as_completed(futures):
+            try:
+                classifications[futures[future]] = future.result()
+            except (ThrottledError, requests.exceptions.RequestException) as e:
+                debug_log("Unable to classify IMDb ID %s: %s", futures[future], e, force=True)
+                continue
+            if on_classified is not None:
+                on_classified(futures[future], classifications[futures[future]])
+
+    return classifications
+
+# Query inserting an IMDb ID with its title, watchlist URL, import date and show_type, IMDb IDs already in the database are ignored
+SHOW_INSERT = "INSERT OR IGNORE INTO shows (imdb_id, title, watchlist_url, imdb_import_date, added_to_sickchill, show_type) VALUES (?, ?, ?, ?, 0, ?)"
+
 # Process and analyze IMDb watchlists to retrieve a list of unique TV series and mini-series
-def imdb_watchlists_init():
+# The watchlists can be given already fetched, as a list of (url, items) tuples
+def imdb_watchlists_init(cur, watchlists=None):
     watchlist_summary = []
     all_series_ids = {}
     unique_series_ids = {}
     unique_unknown_ids = {}
 
-    conn, cur = setup_database()
-
     # Retrieve IMDb IDs and titles from the 'shows' table with a 'show_type' value of 0 or 1
     cur.execute("SELECT imdb_id, title FROM shows WHERE show_type = 0 OR show_type = 1")
     rows = cur.fetchall()
     existing_ids = {row[0]: row[1] for row in rows}  # Convert to dictionary for faster lookup
 
-    for url in settings["watchlist_urls"]:
-        imdb_ids = get_imdb_watchlists(url)
+    # Fetch all watchlists first, so every unknown IMDb ID can be classified in a single concurrent batch
+    if watchlists is None:
+        watchlists = [(url, get_imdb_watchlists(url, cur)) for url in settings["watchlist_urls"]]
+
+    # Items typed by the watchlist page are classified directly, the others are classified from their title page
+    classifications = {}
+    ids_to_classify = {}
+    for url, items in watchlists:
+        for item in items:
+            imdb_id = item["imdb_id"]
+            if imdb_id in existing_ids or imdb_id in classifications:
+                continue
+            if item["title_type"] is not None:
+                classifications[imdb_id] = (item["title_type"] == "series", item["title"])
+                ids_to_classify.pop(imdb_id, None)
+            else:
+                ids_to_classify.setdefault(imdb_id, url)
+    debug_log(f"{len(classifications)} IMDb IDs classified from watchlist metadata, {len(ids_to_classify)} IMDb IDs to classify from their title page")
+
+    # Store each title page classification as soon as it completes, a restarted run doesn't fetch the title page again
+    checkpoint = Checkpoint(cur.connection)
+    import_date = datetime.now().strftime("%Y-%m-%d")
+
+    def store_classification(imdb_id, classification):
+        is_tv_series, title = classification
+        cur.execute(
+            SHOW_INSERT,
+            (imdb_id, title if title is not None else "Unknown IMDB Title", ids_to_classify[imdb_id], import_date, 1 if is_tv_series else 0),
+        )
+        checkpoint.add()
+
+    classifications.update(classify_imdb_ids(list(ids_to_classify), store_classification))
+    checkpoint.commit()
+
+    for url, items in watchlists:
+        imdb_ids = [item["imdb_id"] for item in items]
         series_ids = []
         ignored_ids = []
 
         for imdb_id in imdb_ids:
             if imdb_id in existing_ids:
-                debug_log(f"Ignoring. Already in SickAdd database: {imdb_id} - {existing_ids[imdb_id]}")
+                debug_log("Ignoring. Already in SickAdd database: %s - %s", imdb_id, existing_ids[imdb_id])
                 continue
 
             if imdb_id in all_series_ids:
-                if all_series_ids[imdb_id] == "TV Series" or all_series_ids[imdb_id] == "TV Mini-Series":
+                if all_series_ids[imdb_id] == "series":
                     series_ids.append(imdb_id)
                 else:
                     ignored_ids.append(imdb_id)
+            elif imdb_id not in classifications:
+                # Not classified during this run, process the watchlist again on the next run
+                watchlist_cache_updates.pop(url, None)
             else:
-                is_tv_series, title = detect_imdb_tv_show(imdb_id, analyzed_items=all_series_ids)
+                is_tv_series, title = classifications[imdb_id]
+                # Metadata titles don't name the title type, keep the same types as the watchlist items
+                all_series_ids[imdb_id] = "series" if is_tv_series else "other"
+                if title is None:
+                    title = "Unknown IMDB Title"
                 if is_tv_series:
                     series_ids.append(imdb_id)
-                    all_series_ids[imdb_id] = "TV Series" if "TV Series" in title else "TV Mini-Series" if "TV Mini-Series" in title else "TV Series or Mini-Series"
-                    if title is None:
-                        title = "Unknown IMDB Title"
                     unique_series_ids[imdb_id] = {"title": title, "watchlist_url": url}
                 else:
                     ignored_ids.append(imdb_id)
-                    all_series_ids[imdb_id] = "Not a TV Series"
-                    if title is None:
-                        title = "Unknown IMDB Title"
                     unique_unknown_ids[imdb_id] = {"title": title, "watchlist_url": url}
 
         watchlist_summary.append({
@@ -333,19 +1321,19 @@ def imdb_watchlists_init():
     unknown_list = [dict(imdb_id=k, **v) for k, v in unique_unknown_ids.items()]
 
     # Debug output
+    series_by_watchlist = {}
+    for imdb_id, data in unique_series_ids.items():
+        series_by_watchlist.setdefault(data["watchlist_url"], []).append((imdb_id, data["title"]))
+
     debug_log("\nWatchlist Summary:")
     for summary in watchlist_summary:
-        debug_log(f"URL: {summary['url']}")
-        debug_log(f"  Total items: {summary['total_items']}")
-        debug_log(f"  Series items: {summary['series_items']}")
-        debug_log(f"  Ignored items: {summary['ignored_items']}")
-
-        for imdb_id, data in unique_series_ids.items():
-            if data["watchlist_url"] == summary["url"]:
-                title = data['title'] if data['title'] is not None else "Unknown IMDB Title"
-                debug_log(f"  {imdb_id} - {title} (from {data['watchlist_url']})")
-            else:
-                debug_log(f"  {imdb_id} - Unknown IMDB Title (from {data['watchlist_url']})")
+        debug_log("URL: %s", summary["url"])
+        debug_log("  Total items: %s", summary["total_items"])
+        debug_log("  Series items: %s", summary["series_items"])
+        debug_log("  Ignored items: %s", summary["ignored_items"])
+
+        for imdb_id, title in series_by_watchlist.get(summary["url"], []):
+            debug_log("  %s - %s (from %s)", imdb_id, title if title is not None else "Unknown IMDB Title", summary["url"])
 
     global_total_items = sum([summary["total_items"] for summary in watchlist_summary])
     global_series_items = sum([summary["series_items"] for summary in watchlist_summary])
@@ -364,84 +1352,322 @@ def imdb_watchlists_init():
     # Debug output for series_list
     debug_log("Series to Import into SickAdd:")
     for series in series_list:
-        debug_log(f'  IMDb ID: {series["imdb_id"]}, Title: {series["title"]}, Watchlist URL: {series["watchlist_url"]}')
+        debug_log("  IMDb ID: %s, Title: %s, Watchlist URL: %s", series["imdb_id"], series["title"], series["watchlist_url"])
 
     return series_list, unknown_list
-    
-# Insert series into SQLite database
+
+# Highest number of parameters of a SQLite query, the default limit of SQLite versions older than 3.32
+MAX_QUERY_PARAMETERS = 999
+
+# Return the IMDb IDs of a list which are already in the 'shows' table with a 'show_type' value of 0 or 1
+def get_known_imdb_ids(cur, imdb_ids):
+    known_ids = set()
+    for start in range(0, len(imdb_ids), MAX_QUERY_PARAMETERS):
+        batch = imdb_ids[start:start + MAX_QUERY_PARAMETERS]
+        cur.execute(f"SELECT imdb_id FROM shows WHERE imdb_id IN ({','.join('?' * len(batch))}) AND show_type IN (0, 1)", batch)
+        known_ids.update(row[0] for row in cur.fetchall())
+    return known_ids
+
+# Iterate over the items of the pages of a watchlist in lists of chunk_size items
+def iter_watchlist_chunks(url, response, chunk_size):
+    chunk = []
+    for page_items in iter_watchlist_pages(url, response, keep_seen_ids=False):
+        for item in page_items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+# Classify and store a chunk of watchlist items, updating the counters of the watchlist summary
+# IMDb IDs stored by earlier chunks or earlier runs are found in the database, nothing else is kept between chunks
+# apart from the IMDb IDs of the last page read and the counters of the watchlist
+def process_watchlist_chunk(conn, cur, url, chunk, summary):
+    known_ids = get_known_imdb_ids(cur, [item["imdb_id"] for item in chunk])
+    import_date = datetime.now().strftime("%Y-%m-%d")
+    checkpoint = Checkpoint(conn)
+    ids_to_classify = []
+    new_items = {}
+    for item in chunk:
+        imdb_id = item["imdb_id"]
+        if imdb_id in known_ids or imdb_id in new_items:
+            debug_log("Ignoring. Already in SickAdd database: %s", imdb_id)
+            continue
+        new_items[imdb_id] = item
+        if item["title_type"] is None:
+            ids_to_classify.append(imdb_id)
+        else:
+            is_tv_series = item["title_type"] == "series"
+            cur.execute(SHOW_INSERT, (imdb_id, item["title"] if item["title"] is not None else "Unknown IMDB Title", url, import_date, 1 if is_tv_series else 0))
+            checkpoint.add()
+            summary["series_items" if is_tv_series else "ignored_items"] += 1
+
+    def store_classification(imdb_id, classification):
+        is_tv_series, title = classification
+        cur.execute(SHOW_INSERT, (imdb_id, title if title is not None else "Unknown IMDB Title", url, import_date, 1 if is_tv_series else 0))
+        checkpoint.add()
+        summary["series_items" if is_tv_series else "ignored_items"] += 1
+
+    classifications = classify_imdb_ids(ids_to_classify, store_classification)
+    if len(classifications) < len(ids_to_classify):
+        # Not classified during this run, process the watchlist again on the next run
+        watchlist_cache_updates.pop(url, None)
+    checkpoint.commit()
+    summary["total_items"] += len(chunk)
+
+# Process the watchlists in chunks of chunk_size IMDb IDs, storing each chunk before the next one is read,
+# so the memory used doesn't grow with the size of the watchlists or of the database
+def imdb_watchlists_init_chunked(conn, cur):
+    chunk_size = max(1, int(settings["chunk_size"]))
+    global_summary = {"total_items": 0, "series_items": 0, "ignored_items": 0}
+    for url in settings["watchlist_urls"]:
+        response = get_watchlist_response(url, cur)
+        if response is None:
+            continue
+
+        summary = {"total_items": 0, "series_items": 0, "ignored_items": 0}
+        for chunk in iter_watchlist_chunks(url, response, chunk_size):
+            process_watchlist_chunk(conn, cur, url, chunk, summary)
+
+        debug_log("URL: %s", url)
+        debug_log("  Total items: %s", summary["total_items"])
+        debug_log("  New series items: %s", summary["series_items"])
+        debug_log("  New non-series items: %s", summary["ignored_items"])
+        for key, value in summary.items():
+            global_summary[key] += value
+
+    debug_log("\nGlobal Summary:")
+    debug_log(f"  Total items: {global_summary['total_items']}")
+    debug_log(f"  New series items: {global_summary['series_items']}")
+    debug_log(f"  New non-series items: {global_summary['ignored_items']}")
+
+# Insert series into SQLite database, IMDb IDs already in the database are ignored
 def insert_series_to_db(conn, cur, series_list):
-    for series in series_list:
-        cur.execute("SELECT * FROM shows WHERE imdb_id=?", (series["imdb_id"],))
-        if not cur.fetchone():
-            # Insert series with show_type set to 1
-            cur.execute(
-                "INSERT INTO shows (imdb_id, title, watchlist_url, imdb_import_date, added_to_sickchill, show_type) VALUES (?, ?, ?, ?, ?, ?)",
-                (series["imdb_id"], series["title"], series["watchlist_url"], datetime.now().strftime("%Y-%m-%d"), 0, 1),
-            )
-            conn.commit()
-            debug_log(f'Series added to the database: {series["title"]} (IMDb ID: {series["imdb_id"]})')
-
-# Insert unknown items into SQLite database
+    import_date = datetime.now().strftime("%Y-%m-%d")
+    # Insert series with show_type set to 1
+    cur.executemany(
+        "INSERT OR IGNORE INTO shows (imdb_id, title, watchlist_url, imdb_import_date, added_to_sickchill, show_type) VALUES (?, ?, ?, ?, 0, 1)",
+        [(series["imdb_id"], series["title"], series["watchlist_url"], import_date) for series in series_list],
+    )
+    conn.commit()
+    run_metrics.add_rows(cur.rowcount)
+    debug_log(f"{max(cur.rowcount, 0)} series added to the database")
+
+# Insert unknown items into SQLite database, IMDb IDs already in the database are ignored
 def insert_unique_unknown_ids(conn, cur, unknown_list):
-    for unknown in unknown_list:
-        cur.execute("SELECT * FROM shows WHERE imdb_id=?", (unknown["imdb_id"],))
-        if not cur.fetchone():
-            # Insert unknown item with show_type set to 0
-            cur.execute(
-                "INSERT INTO shows (imdb_id, title, watchlist_url, imdb_import_date, added_to_sickchill, show_type) VALUES (?, ?, ?, ?, ?, ?)",
-                (unknown["imdb_id"], unknown["title"], unknown["watchlist_url"], datetime.now().strftime("%Y-%m-%d"), 0, 0),
-            )
-            conn.commit()
-            debug_log(f'Unknown item added to the database: {unknown["title"]} (IMDb ID: {unknown["imdb_id"]})')
+    import_date = datetime.now().strftime("%Y-%m-%d")
+    # Insert unknown items with show_type set to 0
+    cur.executemany(
+        "INSERT OR IGNORE INTO shows (imdb_id, title, watchlist_url, imdb_import_date, added_to_sickchill, show_type) VALUES (?, ?, ?, ?, 0, 0)",
+        [(unknown["imdb_id"], unknown["title"], unknown["watchlist_url"], import_date) for unknown in unknown_list],
+    )
+    conn.commit()
+    run_metrics.add_rows(cur.rowcount)
+    debug_log(f"{max(cur.rowcount, 0)} unknown items added to the database")
+
+# Return the date of the next TheTVDB lookup for a series, the delay doubles after each failed attempt up to tvdb_retry_max_hours
+def get_thetvdb_next_attempt(attempts, last_attempt):
+    if not attempts or not last_attempt:
+        return None
+    try:
+        last_attempt_date = datetime.strptime(last_attempt, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+    retry_hours = min(float(settings["tvdb_retry_min_hours"]) * (2 ** (attempts - 1)), float(settings["tvdb_retry_max_hours"]))
+    return last_attempt_date + timedelta(hours=retry_hours)
+
+# Return the series without TheTVDB ID whose lookup is due, as (imdb_id, title) tuples
+def get_thetvdb_lookups_due(cur, force_refresh=False):
+    cur.execute("SELECT imdb_id, title, tvdb_attempts, tvdb_last_attempt FROM shows WHERE thetvdb_id IS NULL AND show_type=1")
+    series_without_thetvdb_id = cur.fetchall()
+
+    # Skip series whose previous lookups failed until their next attempt is due
+    now = datetime.now()
+    series_to_lookup = []
+    for imdb_id, title, attempts, last_attempt in series_without_thetvdb_id:
+        next_attempt = get_thetvdb_next_attempt(attempts, last_attempt)
+        if force_refresh or next_attempt is None or next_attempt <= now:
+            series_to_lookup.append((imdb_id, title))
+    debug_log("%s of %s series without TheTVDB ID are due for a lookup", len(series_to_lookup), len(series_without_thetvdb_id))
+    return series_to_lookup
+
+# Return the TheTVDB ID of the first series of a GetSeriesByRemoteID.php XML response, None if there is none
+def parse_thetvdb_series_id(content):
+    root = ElementTree.fromstring(content)
+    series = root if root.tag == "Series" else root.find(".//Series")
+    if series is None:
+        return None
+    series_id = series.find(".//id")
+    if series_id is None:
+        return None
+    return series_id.text or ""
+
+# Look up the TheTVDB ID of a series, returns the TheTVDB ID (None if not found) and the outcome of the lookup
+# Raises ThrottledError if TheTVDB throttled the lookup, and requests' RequestException if TheTVDB couldn't be reached or
+# answered with a server error, the lookup then doesn't count as an attempt
+def lookup_thetvdb_id(imdb_id, title):
+    tvdb_id = None
+    try:
+        url = f"{settings['thetvdb_url']}/api/GetSeriesByRemoteID.php?imdbid={imdb_id}"
+        debug_log("URL used to fetch TheTVDB ID for %s (IMDb ID: %s): %s", title, imdb_id, url)
+        headers = {"User-Agent": "Mozilla/5.0"}
+        response = http_get(url, headers=headers)
+        debug_log("TheTVDB response for %s (IMDb ID: %s): %s", title, imdb_id, response.status_code)
+        if response.status_code in THROTTLED_STATUS_CODES:
+            raise ThrottledError(f"TheTVDB lookup throttled for {title} (IMDb ID: {imdb_id}) - Response code: {response.status_code}")
+        if response.status_code >= 500:
+            raise requests.exceptions.HTTPError(f"TheTVDB lookup failed for {title} (IMDb ID: {imdb_id}) - Response code: {response.status_code}", response=response)
+        if response.status_code != 200:
+            debug_log("Error fetching TheTVDB ID for %s (IMDb ID: %s): %s", title, imdb_id, response.status_code)
+            outcome = f"http_{response.status_code}"
+        elif response.content.strip() == b'':
+            debug_log("Error fetching TheTVDB ID for %s (IMDb ID: %s): empty response", title, imdb_id)
+            outcome = "empty"
+        else:
+            tvdb_id = parse_thetvdb_series_id(response.content)
+            if tvdb_id is None:
+                debug_log("No series found for IMDb ID %s", imdb_id)
+                outcome = "not_found"
+            else:
+                outcome = "found"
+                debug_log("TheTVDB ID found for %s (IMDb ID: %s, TheTVDB ID: %s)", title, imdb_id, tvdb_id)
+    except ElementTree.ParseError as e:
+        debug_log("Error fetching TheTVDB ID for %s (IMDb ID: %s): invalid XML response - %s", title, imdb_id, e)
+        outcome = "invalid"
+    return tvdb_id, outcome
+
+# Query updating a series with the outcome of a TheTVDB lookup
+THETVDB_LOOKUP_UPDATE = "UPDATE shows SET thetvdb_id=COALESCE(?, thetvdb_id), tvdb_attempts=COALESCE(tvdb_attempts, 0)+1, tvdb_last_attempt=?, tvdb_last_outcome=? WHERE imdb_id=?"
 
 # Get TheTVDB ID for series in the database
-def get_thetvdb_ids(conn, cur):
-    cur.execute("SELECT imdb_id, title FROM shows WHERE thetvdb_id IS NULL AND show_type=1")
-    series_without_thetvdb_id = cur.fetchall()
-    for imdb_id, title in series_without_thetvdb_id:
+def get_thetvdb_ids(conn, cur, force_refresh=False):
+    # Store the outcome of each lookup as soon as it completes, a restarted run doesn't repeat it
+    checkpoint = Checkpoint(conn)
+    found_count = 0
+    for imdb_id, title in get_thetvdb_lookups_due(cur, force_refresh):
         try:
-            url = f"https://thetvdb.com/api/GetSeriesByRemoteID.php?imdbid={imdb_id}"
-            debug_log(f"URL used to fetch TheTVDB ID for {title} (IMDb ID: {imdb_id}): {url}")
-            headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(url, headers=headers)
-            debug_log(f"TheTVDB response for {title} (IMDb ID: {imdb_id}): {response.status_code}")
-            if response.status_code != 200 or response.content.strip() == b'':
-                debug_log(f"Error fetching TheTVDB ID for {title} (IMDb ID: {imdb_id}): {response.status_code}")
-                continue
-            soup = BeautifulSoup(response.content, "lxml-xml")
-            series = soup.find("Series")
-            if series is None:
-                debug_log(f"No series found for IMDb ID {imdb_id}")
-                continue
-            tvdb_id = series.find("id").text
-            cur.execute("UPDATE shows SET thetvdb_id=? WHERE imdb_id=?", (tvdb_id, imdb_id))
-            conn.commit()
-            debug_log(f"TheTVDB ID added for {title} (IMDb ID: {imdb_id}, TheTVDB ID: {tvdb_id})")
+            tvdb_id, outcome = lookup_thetvdb_id(imdb_id, title)
+        except ThrottledError as e:
+            debug_log("%s - Retrying on the next run", e, force=True)
+            continue
         except requests.exceptions.RequestException as e:
-            debug_log(f"Error fetching TheTVDB ID for {title} (IMDb ID: {imdb_id}): {e}")
-
-# Get the list of TheTVDB IDs of shows already in SickChill
-def get_sickchill_shows():
+            # TheTVDB being unavailable says nothing about the series, the lookup stays due
+            debug_log("Error fetching TheTVDB ID for %s (IMDb ID: %s): %s - Retrying on the next run", title, imdb_id, e, force=True)
+            continue
+        cur.execute(THETVDB_LOOKUP_UPDATE, (tvdb_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), outcome, imdb_id))
+        checkpoint.add()
+        found_count += tvdb_id is not None
+    checkpoint.commit()
+    debug_log("TheTVDB ID added for %s series", found_count)
+
+# Get the set of TheTVDB IDs of shows already in SickChill, refresh skips the response fetched by check_sickchill
+def get_sickchill_shows(refresh=False):
     url = f"{settings['sickchill_url']}/api/{settings['sickchill_api_key']}/?cmd=shows"
-    response = requests.get(url)
+    # Reuse the response fetched by check_sickchill when available
+    response = run_responses.pop(url, None) if not refresh else None
+    if response is None:
+        response = http_get(url)
     shows = response.json()["data"]
-    tvdb_ids = [int(show["tvdbid"]) for show in shows.values()]
+    tvdb_ids = {int(show["tvdbid"]) for show in shows.values()}
     return tvdb_ids
 
-# Update added_to_sickchill value in the database
-def update_added_to_sickchill(conn, cur, sickchill_tvdb_ids):
-    cur.execute("SELECT thetvdb_id FROM shows WHERE added_to_sickchill=0")
-    shows_to_check = cur.fetchall()
-    for show in shows_to_check:
-        if show[0] in sickchill_tvdb_ids:
-            cur.execute("UPDATE shows SET added_to_sickchill=1 WHERE thetvdb_id=?", (show[0],))
-            conn.commit()
-            debug_log(f"Updated added_to_sickchill value for the series (TheTVDB ID: {show[0]})")
-
-# Add series to SickChill
-def add_series_to_sickchill(conn, cur):
+# Update added_to_sickchill value in the database for series already in SickChill, returns the number of updated series
+# With a tenant, the SickChill state of the tenant is updated
+def update_added_to_sickchill(conn, cur, sickchill_tvdb_ids, tenant=None):
+    # Load the TheTVDB IDs known by SickChill into a temporary table and reconcile with a single UPDATE
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS sickchill_shows (thetvdb_id INTEGER PRIMARY KEY)")
+    cur.execute("DELETE FROM sickchill_shows")
+    cur.executemany("INSERT OR IGNORE INTO sickchill_shows (thetvdb_id) VALUES (?)", ((tvdb_id,) for tvdb_id in sickchill_tvdb_ids))
+    if tenant is None:
+        cur.execute("UPDATE shows SET added_to_sickchill=1 WHERE added_to_sickchill=0 AND thetvdb_id IN (SELECT thetvdb_id FROM sickchill_shows)")
+    else:
+        cur.execute(
+            "UPDATE tenant_shows SET added_to_sickchill=1 WHERE tenant=? AND added_to_sickchill=0 "
+            "AND imdb_id IN (SELECT imdb_id FROM shows WHERE thetvdb_id IN (SELECT thetvdb_id FROM sickchill_shows))",
+            (tenant,),
+        )
+    updated_count = cur.rowcount
+    conn.commit()
+    run_metrics.add_rows(updated_count)
+    debug_log(f"Updated added_to_sickchill value for {updated_count} series already in SickChill")
+    return updated_count
+
+# Add a series to SickChill, returns None if it was added, the reason it wasn't otherwise
+def add_show_to_sickchill(thetvdb_id, title):
+    debug_log(f"Attempting to add series to SickChill (TheTVDB ID: {thetvdb_id}, Title: {title})")
+    url = f"{settings['sickchill_url']}/api/{settings['sickchill_api_key']}/?cmd=show.addnew&indexerid={thetvdb_id}"
+    debug_log(f"URL called to add the series to SickChill: {url}")
+    try:
+        response = http_get(url)
+    except requests.exceptions.RequestException as e:
+        error = f"Request error: {e}"
+    else:
+        if response.status_code != 200:
+            error = f"Response code: {response.status_code}"
+        else:
+            try:
+                data = response.json()
+            except ValueError:
+                data = {"message": "Invalid JSON response"}
+            if data.get("result") == "success":
+                debug_log(f"Series added to SickChill (TheTVDB ID: {thetvdb_id}, Title: {title})")
+                return None
+            error = f"SickChill: {data.get('message') or data.get('result')}"
+    debug_log(f"Unable to add series to SickChill (TheTVDB ID: {thetvdb_id}, Title: {title}) - {error}")
+    return error
+
+# Return the date of the next attempt to add a series to SickChill after a given number of failed attempts,
+# the delay doubles after each failed attempt up to sickchill_retry_max_hours
+def get_sickchill_next_retry(attempts, last_attempt):
+    retry_hours = min(float(settings["sickchill_retry_min_hours"]) * (2 ** (attempts - 1)), float(settings["sickchill_retry_max_hours"]))
+    return last_attempt + timedelta(hours=retry_hours)
+
+# Store the outcome of an attempt to add a series to SickChill, error is None if the series was added
+# attempts is the number of attempts before this one, with a tenant the SickChill state of the tenant is updated
+def save_sickchill_outcome(cur, thetvdb_id, attempts, error, tenant=None):
+    now = datetime.now()
+    if error is None:
+        assignments = "added_to_sickchill=1, sc_added_date=?, sc_last_error=NULL, sc_next_retry=NULL"
+        parameters = [now.strftime("%Y-%m-%d")]
+    else:
+        assignments = "sc_last_error=?, sc_next_retry=?"
+        parameters = [error, get_sickchill_next_retry(attempts + 1, now).strftime("%Y-%m-%d %H:%M:%S")]
+    assignments += ", sc_attempts=COALESCE(sc_attempts, 0)+1, sc_last_attempt=?"
+    parameters.append(now.strftime("%Y-%m-%d %H:%M:%S"))
+    if tenant is None:
+        cur.execute(f"UPDATE shows SET {assignments} WHERE added_to_sickchill=0 AND thetvdb_id=?", parameters + [thetvdb_id])
+    else:
+        cur.execute(
+            f"UPDATE tenant_shows SET {assignments} WHERE tenant=? AND added_to_sickchill=0 AND imdb_id IN (SELECT imdb_id FROM shows WHERE thetvdb_id=?)",
+            parameters + [tenant, thetvdb_id],
+        )
+
+# Return the FROM clause, conditions and parameters selecting the series not added to SickChill yet, for all series or a tenant,
+# and the alias of the table holding their SickChill state
+def get_pending_shows_query(tenant=None):
+    if tenant is None:
+        return "shows AS s", "s.added_to_sickchill=0", [], "s"
+    return "tenant_shows AS t JOIN shows AS s ON s.imdb_id = t.imdb_id", "t.tenant=? AND t.added_to_sickchill=0", [tenant], "t"
+
+# Return the series to add to SickChill whose next attempt is due, as (thetvdb_id, title, attempts) tuples,
+# a TheTVDB ID shared by several IMDb IDs is returned once
+def get_sickchill_additions_due(cur, tenant=None):
+    source, pending, parameters, state = get_pending_shows_query(tenant)
+    cur.execute(
+        f"SELECT s.thetvdb_id, MIN(s.title), MAX(COALESCE({state}.sc_attempts, 0)) FROM {source} "
+        f"WHERE {pending} AND s.show_type=1 AND s.thetvdb_id IS NOT NULL AND s.thetvdb_id<>'' "
+        f"AND ({state}.sc_next_retry IS NULL OR {state}.sc_next_retry<=?) GROUP BY s.thetvdb_id",
+        parameters + [datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+    )
+    return cur.fetchall()
+
+# Add series to SickChill, with a tenant the series of the tenant are added to its SickChill
+def add_series_to_sickchill(conn, cur, tenant=None):
+    source, pending, parameters, _ = get_pending_shows_query(tenant)
+
     # Get shows with null or empty thetvdb_id
-    cur.execute("SELECT imdb_id, title FROM shows WHERE added_to_sickchill=0 AND show_type=1 AND (thetvdb_id IS NULL OR thetvdb_id='')")
+    cur.execute(f"SELECT s.imdb_id, s.title FROM {source} WHERE {pending} AND s.show_type=1 AND (s.thetvdb_id IS NULL OR s.thetvdb_id='')", parameters)
     shows_with_null_thetvdb_id = cur.fetchall()
     message = f"{len(shows_with_null_thetvdb_id)} TV shows will be skipped due to missing TheTVDB IDs."
     debug_log(message, force=True)
@@ -449,96 +1675,472 @@ def add_series_to_sickchill(conn, cur):
         message = f"Missing TheTVDB ID for TV show with IMDB ID: {show[0]} and Title: {show[1]}"
         debug_log(message, force=True)
 
-    # Get shows to add to SickChill
-    cur.execute("SELECT thetvdb_id, title FROM shows WHERE added_to_sickchill=0 AND show_type=1 AND thetvdb_id IS NOT NULL AND thetvdb_id<>''")
-    shows_to_add = cur.fetchall()
+    shows_to_add = get_sickchill_additions_due(cur, tenant)
     debug_log(f"{len(shows_to_add)} series to add to SickChill")
 
-    added_to_sickchill = False
-
-    for show in shows_to_add:
-        thetvdb_id, title = show
-        debug_log(f"Attempting to add series to SickChill (TheTVDB ID: {thetvdb_id}, Title: {title})")
-        url = f"{settings['sickchill_url']}/api/{settings['sickchill_api_key']}/?cmd=show.addnew&indexerid={thetvdb_id}"
-        debug_log(f"URL called to add the series to SickChill: {url}")
-        response = requests.get(url)
-        if response.status_code == 200 and response.json()["result"] == "success":
-            cur.execute("UPDATE shows SET added_to_sickchill=1, sc_added_date=? WHERE thetvdb_id=?", (datetime.now().strftime("%Y-%m-%d"), thetvdb_id))
-            conn.commit()
-            debug_log(f"Series added to SickChill (TheTVDB ID: {thetvdb_id}, Title: {title})")
-            added_to_sickchill = True
-        else:
-            debug_log(f"Unable to add series to SickChill (TheTVDB ID: {thetvdb_id}, Title: {title}) - Response code: {response.status_code}")
-
-    if added_to_sickchill:
+    try:
+        max_workers = max(1, int(settings["sickchill_workers"]))
+    except (KeyError, ValueError, TypeError):
+        max_workers = 1
+
+    # Submit the series concurrently, up to sickchill_workers at a time, and store the outcome of each one as soon as
+    # it completes, a restarted run doesn't add it again
+    checkpoint = Checkpoint(conn)
+    added_ids = []
+    failed_count = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(add_show_to_sickchill, thetvdb_id, title): (thetvdb_id, attempts) for thetvdb_id, title, attempts in shows_to_add}
+        for future in as_completed(futures):
+            thetvdb_id, attempts = futures[future]
+            error = future.result()
+            save_sickchill_outcome(cur, thetvdb_id, attempts, error, tenant)
+            checkpoint.add()
+            if error is None:
+                added_ids.append(int(thetvdb_id))
+            else:
+                failed_count += 1
+    checkpoint.commit()
+    added_count = len(added_ids)
+
+    # Verify the additions against a single fresh list of the SickChill shows: a series whose request failed may still
+    # have been added, and the series accepted but not listed yet are waiting in the SickChill queue
+    if shows_to_add:
+        sickchill_tvdb_ids = get_sickchill_shows(refresh=True)
+        listed_count = sum(1 for thetvdb_id in added_ids if thetvdb_id in sickchill_tvdb_ids)
+        debug_log(f"{added_count} series added to SickChill ({listed_count} already listed, the others are queued), {failed_count} failed", force=True)
+        if failed_count:
+            update_added_to_sickchill(conn, cur, sickchill_tvdb_ids, tenant)
+
+    if added_count:
         debug_log("Import to SickChill is complete. SickAdd will now exit.", force=True)
     else:
         debug_log("No new TV series to import. SickAdd will now exit", force=True)
 
+########## PIPELINE SECTION #######
+# Process the watchlists as a pipeline: every new series flows through classification, TheTVDB lookup and SickChill
+# on its own, connected by bounded queues, instead of waiting for each phase to complete for all series
+# Only the calling thread uses the database, the stages send it their results to store
+def run_pipeline(conn, cur, force_tvdb_refresh=False):
+    start_time = time.monotonic()
+    queue_size = max(1, int(settings["pipeline_queue_size"]))
+    classify_queue = queue.Queue(queue_size)
+    resolve_queue = queue.Queue(queue_size)
+    add_queue = queue.Queue(queue_size)
+    results = queue.SimpleQueue()
+    stop_event = threading.Event()
+    try:
+        classify_workers = max(1, int(settings["imdb_workers"]))
+    except (KeyError, ValueError, TypeError):
+        classify_workers = 1
+    running_classify_workers = [classify_workers]
+    workers_lock = threading.Lock()
+    stats = {"classified": 0, "series": 0, "tvdb_found": 0, "added": 0, "add_failed": 0, "first_add_seconds": None}
+    checkpoint = Checkpoint(conn)
+
+    # Work left by previous runs is processed when the stages are idle
+    sickchill_tvdb_ids = get_sickchill_shows()
+    update_added_to_sickchill(conn, cur, sickchill_tvdb_ids)
+    resolve_backlog = get_thetvdb_lookups_due(cur, force_tvdb_refresh)
+    cur.execute(
+        "SELECT thetvdb_id, title, COALESCE(sc_attempts, 0) FROM shows WHERE added_to_sickchill=0 AND show_type=1 AND thetvdb_id IS NOT NULL "
+        "AND thetvdb_id<>'' AND (sc_next_retry IS NULL OR sc_next_retry<=?)",
+        (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),),
+    )
+    add_backlog = cur.fetchall()
+    debug_log(f"Pipeline started with {len(resolve_backlog)} TheTVDB lookups and {len(add_backlog)} SickChill additions left by previous runs")
+
+    # Iterate over the items of a stage queue until it is closed, taking items from the backlog when the queue is empty
+    def iter_stage_items(stage_queue, backlog):
+        while True:
+            try:
+                item = stage_queue.get_nowait()
+            except queue.Empty:
+                item = backlog.pop(0) if backlog and not stop_event.is_set() else stage_queue.get()
+            if item is None:
+                break
+            yield item
+        while backlog and not stop_event.is_set():
+            yield backlog.pop(0)
+
+    def classify_stage():
+        try:
+            while True:
+                item = classify_queue.get()
+                if item is None:
+                    break
+                imdb_id, url = item
+                if stop_event.is_set():
+                    # The item is not stored, process its watchlist again on the next run
+                    results.put(("failed", url))
+                    continue
+                try:
+                    is_tv_series, title = detect_imdb_tv_show(imdb_id)
+                except Exception as e:
+                    debug_log("Unable to classify IMDb ID %s: %r", imdb_id, e, force=True)
+                    results.put(("failed", url))
+                    continue
+                results.put(("show", imdb_id, title, url, 1 if is_tv_series else 0))
+                if is_tv_series:
+                    resolve_queue.put((imdb_id, title))
+        finally:
+            # The last classification worker to stop stops the next stage
+            with workers_lock:
+                running_classify_workers[0] -= 1
+                last_worker = running_classify_workers[0] == 0
+            if last_worker:
+                resolve_queue.put(None)
+
+    def resolve_stage():
+        try:
+            for imdb_id, title in iter_stage_items(resolve_queue, resolve_backlog):
+                if stop_event.is_set():
+                    continue
+                try:
+                    tvdb_id, outcome = lookup_thetvdb_id(imdb_id, title)
+                except Exception as e:
+                    debug_log("Unable to look up the TheTVDB ID of %s: %r", imdb_id, e, force=True)
+                    continue
+                results.put(("tvdb", tvdb_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), outcome, imdb_id))
+                if tvdb_id is not None:
+                    add_queue.put((tvdb_id, title, 0))
+        finally:
+            add_queue.put(None)
+
+    def add_stage():
+        attempted_tvdb_ids = set()
+        for thetvdb_id, title, attempts in iter_stage_items(add_queue, add_backlog):
+            if stop_event.is_set():
+                continue
+            try:
+                # Series found by the lookup can already be in SickChill, and several IMDb IDs can share a TheTVDB ID
+                if int(thetvdb_id) in sickchill_tvdb_ids:
+                    results.put(("in_sickchill", thetvdb_id))
+                    continue
+                if int(thetvdb_id) in attempted_tvdb_ids:
+                    continue
+                attempted_tvdb_ids.add(int(thetvdb_id))
+                results.put(("sickchill_add", thetvdb_id, attempts, add_show_to_sickchill(thetvdb_id, title)))
+            except Exception as e:
+                debug_log("Unable to add series to SickChill (TheTVDB ID: %s): %r", thetvdb_id, e, force=True)
+
+    # Store the results sent by the stages, in the order they were sent, committing at most once per checkpoint interval
+    def store_results(timeout=None, commit=False):
+        stored = 0
+        import_date = datetime.now().strftime("%Y-%m-%d")
+        while True:
+            try:
+                result = results.get(timeout=timeout) if timeout and not stored else results.get_nowait()
+            except queue.Empty:
+                break
+            kind = result[0]
+            if kind == "show":
+                imdb_id, title, url, show_type = result[1:]
+                cur.execute(
+                    SHOW_INSERT,
+                    (imdb_id, title, url, import_date, show_type),
+                )
+                stats["classified"] += 1
+                stats["series"] += show_type
+            elif kind == "tvdb":
+                cur.execute(THETVDB_LOOKUP_UPDATE, result[1:])
+                stats["tvdb_found"] += result[1] is not None
+            elif kind == "in_sickchill":
+                cur.execute("UPDATE shows SET added_to_sickchill=1 WHERE added_to_sickchill=0 AND thetvdb_id=?", result[1:])
+            elif kind == "sickchill_add":
+                thetvdb_id, attempts, error = result[1:]
+                save_sickchill_outcome(cur, thetvdb_id, attempts, error)
+                if error is not None:
+                    stats["add_failed"] += 1
+                else:
+                    stats["added"] += 1
+                    if stats["first_add_seconds"] is None:
+                        stats["first_add_seconds"] = time.monotonic() - start_time
+                        debug_log("First series added to SickChill after %.1f seconds", stats["first_add_seconds"])
+            elif kind == "failed":
+                # Process the watchlist again on the next run
+                watchlist_cache_updates.pop(result[1], None)
+            stored += 1
+        checkpoint.add(stored)
+        if commit:
+            checkpoint.commit()
+
+    # Queue an item for the next stage, storing the results received while the queue is full
+    def put_item(stage_queue, item):
+        while True:
+            try:
+                stage_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                store_results()
+
+    threads = [threading.Thread(target=classify_stage, name=f"sickadd-classify-{index}", daemon=True) for index in range(classify_workers)]
+    threads.append(threading.Thread(target=resolve_stage, name="sickadd-resolve", daemon=True))
+    threads.append(threading.Thread(target=add_stage, name="sickadd-add", daemon=True))
+    for thread in threads:
+        thread.start()
+
+    url = None
+    try:
+        cur.execute("SELECT imdb_id FROM shows WHERE show_type = 0 OR show_type = 1")
+        seen_ids = {row[0] for row in cur.fetchall()}
+        for url in settings["watchlist_urls"]:
+            response = get_watchlist_response(url, cur)
+            if response is None:
+                continue
+            for page_items in iter_watchlist_pages(url, response):
+                for item in page_items:
+                    imdb_id = item["imdb_id"]
+                    if imdb_id in seen_ids:
+                        continue
+                    seen_ids.add(imdb_id)
+                    if item["title_type"] is None:
+                        put_item(classify_queue, (imdb_id, url))
+                    else:
+                        # Items typed by the watchlist page skip the classification stage
+                        is_tv_series = item["title_type"] == "series"
+                        title = item["title"] if item["title"] is not None else "Unknown IMDB Title"
+                        results.put(("show", imdb_id, title, url, 1 if is_tv_series else 0))
+                        if is_tv_series:
+                            put_item(resolve_queue, (imdb_id, title))
+                store_results()
+    except BaseException:
+        # Stop processing new items, the results already received are still stored
+        stop_event.set()
+        # The watchlist being read wasn't fully processed, its cache entry must not let the next run skip it
+        if url is not None:
+            watchlist_cache_updates.pop(url, None)
+        raise
+    finally:
+        for _ in range(classify_workers):
+            put_item(classify_queue, None)
+        for thread in threads:
+            while thread.is_alive():
+                store_results(timeout=0.1)
+                thread.join(timeout=0)
+        store_results(commit=True)
+        save_watchlist_cache(conn, cur)
+
+    # A series whose request failed may still have been added, check them against a single fresh list of the SickChill shows
+    if stats["add_failed"]:
+        update_added_to_sickchill(conn, cur, get_sickchill_shows(refresh=True))
+
+    debug_log(
+        "Pipeline completed in %.1f seconds: %s new items classified, %s series, %s TheTVDB IDs found, %s series added to SickChill, %s failed",
+        time.monotonic() - start_time, stats["classified"], stats["series"], stats["tvdb_found"], stats["added"], stats["add_failed"], force=True,
+    )
+
 
 
 
-# Show db content
-def show_db_content(cursor):
-    # Select records where the Type is Unknown (Not TV Shows)
-    cursor.execute("SELECT * FROM shows WHERE show_type = 0")
-    type_unknowns = cursor.fetchall()
-
-    # Select records where the Type is TV Show or Mini Series
-    cursor.execute("SELECT * FROM shows WHERE show_type = 1")
-    type_tv_shows = cursor.fetchall()
-
-    # Select records with incomplete data
-    cursor.execute("SELECT * FROM shows WHERE show_type NOT IN (0, 1)")
-    incomplete_records = cursor.fetchall()
-
-    # Print table of records where the Type is Unknown (Not TV Shows)
-    if type_unknowns:
-        print("\n\nUnknown Records (Not TV Shows):")
-        if cursor.description:
-            columns = [column[0] for column in cursor.description]
-            column_names = "|".join(columns)
-            print(f"+{'-' * len(column_names.replace('|', ''))}+")
-            print(f"| {column_names} |")
-            print(f"+{'-' * len(column_names.replace('|', ''))}+")
-        for row in type_unknowns:
-            row_values = "|".join([str(value) for value in row])
-            print(f"| {row_values} |")
-        if cursor.description:
-            print(f"+{'-' * len(column_names.replace('|', ''))}+")
-        print("\n")
+########## TENANTS SECTION #######
+# Settings of each tenant, every tenant has its own watchlists and SickChill
+TENANT_SETTINGS = ("watchlist_urls", "sickchill_url", "sickchill_api_key")
+
+# Load a JSON configuration file, its keys override the settings and its "tenants" key lists the tenants, for example:
+# {"imdb_workers": 8, "tenants": [{"name": "home", "watchlist_urls": ["https://www.imdb.com/list/ls123456789"],
+#                                  "sickchill_url": "http://sickchill_ip:port", "sickchill_api_key": "your_sickchill_api_key"}]}
+def load_config(config_path):
+    try:
+        with open(config_path) as config_file:
+            config = json.load(config_file)
+    except (OSError, ValueError) as e:
+        print(f"Error: Unable to read the configuration file {config_path}: {e}")
+        sys.exit(1)
+
+    tenant_names = set()
+    for tenant in config.get("tenants", []):
+        missing_settings = [key for key in ("name",) + TENANT_SETTINGS if not tenant.get(key)]
+        if missing_settings:
+            print(f"Error: Tenant {tenant.get('name', '?')} is missing settings: {', '.join(missing_settings)}")
+            sys.exit(1)
+        if tenant["name"] in tenant_names:
+            print(f"Error: Tenant {tenant['name']} is defined twice")
+            sys.exit(1)
+        tenant_names.add(tenant["name"])
+        if isinstance(tenant["watchlist_urls"], str):
+            tenant["watchlist_urls"] = [url.strip() for url in tenant["watchlist_urls"].split(",")]
+
+    settings.update(config)
+    debug_log(f"Configuration loaded from {config_path} with {len(tenant_names)} tenants")
+
+# Apply the settings of a tenant for the duration of a block
+@contextmanager
+def tenant_settings(tenant):
+    saved_settings = {key: settings[key] for key in TENANT_SETTINGS}
+    settings.update({key: tenant[key] for key in TENANT_SETTINGS})
+    try:
+        yield
+    finally:
+        settings.update(saved_settings)
+
+# Process the watchlists of all tenants: each watchlist, IMDb title and TheTVDB lookup is fetched once for all tenants,
+# then the series of each tenant are added to its own SickChill
+def run_tenants(conn, cur, force_tvdb_refresh=False):
+    tenants = settings["tenants"]
+    watchlist_tenants = {}
+    for tenant in tenants:
+        for url in tenant["watchlist_urls"]:
+            # A run can be limited to some of the watchlists of the tenants
+            if settings["tenant_watchlist_urls"] and url not in settings["tenant_watchlist_urls"]:
+                continue
+            watchlist_tenants.setdefault(url, []).append(tenant["name"])
+
+    # A tenant new to a watchlist needs all its items, even if the watchlist is unchanged since another tenant processed it
+    cur.execute("SELECT tenant, url FROM tenant_watchlists")
+    processed_watchlists = set(cur.fetchall())
+    due_urls = get_due_watchlists(cur, list(watchlist_tenants)) if settings["adaptive_polling"] else list(watchlist_tenants)
+    conditional_urls = {url for url, tenant_names in watchlist_tenants.items() if all((tenant_name, url) in processed_watchlists for tenant_name in tenant_names)}
+    fetched_urls = [url for url in watchlist_tenants if url in due_urls or url not in conditional_urls]
+
+    # A run with no watchlist, TheTVDB lookup or SickChill addition due stops before contacting SickChill and TheTVDB
+    if (settings["adaptive_polling"] and not fetched_urls and not get_thetvdb_lookups_due(cur, force_tvdb_refresh)
+            and not any(get_sickchill_additions_due(cur, tenant["name"]) for tenant in tenants)):
+        debug_log("No watchlist, TheTVDB lookup or SickChill addition is due, nothing to do")
+        return
+
+    with run_metrics.phase("checks"):
+        check_thetvdb()
+
+    with run_metrics.phase("imdb_watchlists_init"):
+        watchlists = [(url, get_imdb_watchlists(url, cur if url in conditional_urls else None)) for url in fetched_urls]
+        series_list, unknown_list = imdb_watchlists_init(cur, watchlists)
+
+    with run_metrics.phase("database_inserts"):
+        insert_series_to_db(conn, cur, series_list)
+        insert_unique_unknown_ids(conn, cur, unknown_list)
+        import_date = datetime.now().strftime("%Y-%m-%d")
+        cur.executemany(
+            "INSERT OR IGNORE INTO tenant_shows (tenant, imdb_id, watchlist_url, imdb_import_date, added_to_sickchill) VALUES (?, ?, ?, ?, 0)",
+            [(tenant_name, item["imdb_id"], url, import_date) for url, items in watchlists for item in items for tenant_name in watchlist_tenants[url]],
+        )
+        run_metrics.add_rows(cur.rowcount)
+        debug_log(f"{max(cur.rowcount, 0)} watchlist items added to the tenants")
+        # Only the watchlists fully processed during this run have a cache entry
+        cur.executemany(
+            "INSERT OR IGNORE INTO tenant_watchlists (tenant, url) VALUES (?, ?)",
+            [(tenant_name, url) for url in watchlist_cache_updates for tenant_name in watchlist_tenants[url]],
+        )
+        save_watchlist_cache(conn, cur)
+
+    with run_metrics.phase("get_thetvdb_ids"):
+        get_thetvdb_ids(conn, cur, force_tvdb_refresh)
+
+    for tenant in tenants:
+        with run_metrics.phase(f"tenant_{tenant['name']}"), tenant_settings(tenant):
+            debug_log(f"Processing tenant {tenant['name']}")
+            try:
+                check_sickchill()
+                sickchill_tvdb_ids = get_sickchill_shows()
+                update_added_to_sickchill(conn, cur, sickchill_tvdb_ids, tenant["name"])
+                add_series_to_sickchill(conn, cur, tenant["name"])
+            except SystemExit:
+                # The SickChill of a tenant being unreachable doesn't stop the other tenants
+                debug_log(f"Tenant {tenant['name']} skipped, its SickChill is not reachable", force=True)
 
-    # Print table of records where the Type is TV Show or Mini Series
-    if type_tv_shows:
-        print("TV Shows and Mini Series:")
-        if cursor.description:
-            columns = [column[0] for column in cursor.description]
-            column_names = "|".join(columns)
-            print(f"+{'-' * len(column_names.replace('|', ''))}+")
-            print(f"| {column_names} |")
-            print(f"+{'-' * len(column_names.replace('|', ''))}+")
-        for row in type_tv_shows:
-            row_values = "|".join([str(value) for value in row])
-            print(f"| {row_values} |")
-        if cursor.description:
-            print(f"+{'-' * len(column_names.replace('|', ''))}+")
-        print("\n")
 
-    # Print table of records with incomplete data
-    if incomplete_records:
-        print("Incomplete Records - try to delete the ID using --delete:")
-        if cursor.description:
-            columns = [column[0] for column in cursor.description]
-            column_names = "|".join(columns)
-            print(f"+{'-' * len(column_names.replace('|', ''))}+")
-            print(f"| {column_names} |")
-            print(f"+{'-' * len(column_names.replace('|', ''))}+")
-        for row in incomplete_records:
-            row_values = "|".join([str(value) for value in row])
-            print(f"| {row_values} |")
-        if cursor.description:
-            print(f"+{'-' * len(column_names.replace('|', ''))}+")
+# Show db content
+# Columns of the "Pending TheTVDB lookups" section
+PENDING_THETVDB_COLUMNS = ["imdb_id", "title", "tvdb_attempts", "tvdb_last_attempt", "tvdb_last_outcome"]
+
+# Build the WHERE clause and parameters of the --showdb filters
+def get_show_filters(filters):
+    conditions = []
+    parameters = []
+    if filters.get("show_type") == "unknown":
+        conditions.append("show_type = 0")
+    elif filters.get("show_type") == "series":
+        conditions.append("show_type = 1")
+    elif filters.get("show_type") == "incomplete":
+        conditions.append("show_type NOT IN (0, 1)")
+    if filters.get("sickchill_status") == "added":
+        conditions.append("added_to_sickchill = 1")
+    elif filters.get("sickchill_status") == "pending":
+        conditions.append("COALESCE(added_to_sickchill, 0) = 0")
+    if filters.get("missing_tvdb"):
+        conditions.append("(thetvdb_id IS NULL OR thetvdb_id = '')")
+    if filters.get("watchlist"):
+        conditions.append("watchlist_url = ?")
+        parameters.append(filters["watchlist"])
+    if filters.get("since"):
+        conditions.append("imdb_import_date >= ?")
+        parameters.append(filters["since"])
+    if filters.get("until"):
+        conditions.append("imdb_import_date <= ?")
+        parameters.append(filters["until"])
+    return conditions, parameters
+
+# Run a query on the "shows" table with the --showdb filters and paging, the rows are read lazily from the returned cursor
+def query_shows(cursor, filters, columns="*", conditions=(), limit=None, offset=None):
+    filter_conditions, parameters = get_show_filters(filters)
+    conditions = list(conditions) + filter_conditions
+    query = f"SELECT {columns} FROM shows"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    # Pages follow the insertion order, unpaged results are streamed in index order without sorting the table
+    if limit is not None or offset:
+        query += " ORDER BY rowid LIMIT ? OFFSET ?"
+        parameters += [limit if limit is not None else -1, offset or 0]
+    return cursor.execute(query, parameters)
+
+# Print a table of rows as they are read, nothing is printed for an empty table
+def print_table(title, column_names, rows):
+    separator = None
+    for row in rows:
+        if separator is None:
+            header = "|".join(column_names)
+            separator = f"+{'-' * len(header.replace('|', ''))}+"
+            print(title)
+            print(separator)
+            print(f"| {header} |")
+            print(separator)
+        print(f"| {'|'.join([str(value) for value in row])} |")
+    if separator is not None:
+        print(separator)
         print("\n")
+
+# Add the date of the next TheTVDB lookup to the rows of series waiting for a TheTVDB ID
+def iter_pending_thetvdb_lookups(rows):
+    for imdb_id, title, attempts, last_attempt, last_outcome in rows:
+        next_attempt = get_thetvdb_next_attempt(attempts, last_attempt)
+        next_attempt = next_attempt.strftime("%Y-%m-%d %H:%M:%S") if next_attempt else "next run"
+        yield imdb_id, title, attempts, last_attempt, last_outcome, next_attempt
+
+# Display the content of the database, filtered and paged, as tables or exported as JSON or CSV
+def show_db_content(cursor, filters=None, output_format="table", limit=None, offset=None):
+    filters = filters or {}
+
+    if output_format == "json":
+        # Write the JSON array row by row, so the output starts right away and the table is never held in memory
+        rows = query_shows(cursor, filters, limit=limit, offset=offset)
+        columns = [column[0] for column in cursor.description]
+        sys.stdout.write("[")
+        for index, row in enumerate(rows):
+            sys.stdout.write(("," if index else "") + "\n  " + json.dumps(dict(zip(columns, row))))
+        sys.stdout.write("\n]\n")
+        return
+
+    if output_format == "csv":
+        rows = query_shows(cursor, filters, limit=limit, offset=offset)
+        writer = csv.writer(sys.stdout)
+        writer.writerow([column[0] for column in cursor.description])
+        writer.writerows(rows)
+        return
+
+    # Paging applies to each table
+    sections = (
+        ("unknown", "\n\nUnknown Records (Not TV Shows):", "show_type = 0"),
+        ("series", "TV Shows and Mini Series:", "show_type = 1"),
+        ("incomplete", "Incomplete Records - try to delete the ID using --delete:", "show_type NOT IN (0, 1)"),
+    )
+    for show_type, title, condition in sections:
+        if filters.get("show_type") in (None, show_type):
+            rows = query_shows(cursor, filters, conditions=[condition], limit=limit, offset=offset)
+            print_table(title, [column[0] for column in cursor.description], rows)
+
+    # Print table of series waiting for a TheTVDB ID, with the date of their next lookup
+    if filters.get("show_type") in (None, "series"):
+        rows = query_shows(cursor, filters, ", ".join(PENDING_THETVDB_COLUMNS), ["show_type = 1", "thetvdb_id IS NULL"], limit, offset)
+        print_table("Pending TheTVDB lookups:", PENDING_THETVDB_COLUMNS + ["tvdb_next_attempt"], iter_pending_thetvdb_lookups(rows))
 #############################
 
 # Delete series from SQLite database
@@ -549,30 +2151,84 @@ def delete_series_from_db(conn, cur, imdb_id):
         debug_log(f"The series does not exist in the database (IMDb ID: {imdb_id})")
     else:
         cur.execute("DELETE FROM shows WHERE imdb_id=?", (imdb_id,))
+        # Clear the watchlist cache so the next run scans every watchlist again
+        cur.execute("DELETE FROM watchlist_cache")
         conn.commit()
         debug_log(f"Series removed from the database (IMDb ID: {imdb_id})")
 
-# Initial db check
-def check_database():
-    conn, cur = setup_database()
-    conn.close()
-
-
-# Main function
-def main():
-    check_database()
-    check_watchlists()
-    check_sickchill()
-    check_thetvdb()
-    conn, cur = setup_database()
-    series_list, unknown_list = imdb_watchlists_init()
-    insert_series_to_db(conn, cur, series_list)    
-    insert_unique_unknown_ids(conn, cur, unknown_list)
-    get_thetvdb_ids(conn, cur)
-    sickchill_tvdb_ids = get_sickchill_shows()
-    update_added_to_sickchill(conn, cur, sickchill_tvdb_ids)
-    add_series_to_sickchill(conn, cur)
-    conn.close()
+# Main function, an already open database connection can be passed to reuse it across runs
+def main(force_tvdb_refresh=False, conn=None, cur=None):
+    global run_metrics
+    run_metrics = RunMetrics()
+    run_responses.clear()
+    watchlist_stats.clear()
+    watchlist_cache_updates.clear()
+    watchlist_polls.clear()
+    close_database = conn is None
+    run_id = None
+    try:
+        with run_metrics.phase("setup_database"):
+            if close_database:
+                conn, cur = setup_database()
+            run_id = start_run_state(conn, cur)
+        run_metrics.on_phase_start = lambda phase: set_run_phase(conn, cur, run_id, phase)
+        if settings["tenants"]:
+            run_tenants(conn, cur, force_tvdb_refresh)
+        else:
+            run_single_tenant(conn, cur, force_tvdb_refresh)
+        run_metrics.success = True
+    finally:
+        run_metrics.end_time = time.time()
+        write_run_report()
+        if run_id is not None:
+            finish_run_state(conn, cur, run_id, "completed" if run_metrics.success else "failed")
+        if close_database and conn is not None:
+            conn.close()
+
+# Process the watchlists set by the settings, only those due for a poll when adaptive polling is enabled
+def run_single_tenant(conn, cur, force_tvdb_refresh=False):
+    with due_watchlists_settings(cur):
+        # A run with no watchlist, TheTVDB lookup or SickChill addition due stops before contacting SickChill and TheTVDB
+        if settings["adaptive_polling"] and not settings["watchlist_urls"] and not get_thetvdb_lookups_due(cur, force_tvdb_refresh) and not get_sickchill_additions_due(cur):
+            debug_log("No watchlist, TheTVDB lookup or SickChill addition is due, nothing to do")
+            return
+        with run_metrics.phase("checks"):
+            if settings["watchlist_urls"] or not settings["adaptive_polling"]:
+                check_watchlists(cur)
+            else:
+                debug_log("No watchlist is due for a poll")
+            check_sickchill()
+            check_thetvdb()
+        if settings["pipeline"]:
+            with run_metrics.phase("pipeline"):
+                run_pipeline(conn, cur, force_tvdb_refresh)
+        else:
+            if settings["chunk_size"]:
+                with run_metrics.phase("imdb_watchlists_init"):
+                    imdb_watchlists_init_chunked(conn, cur)
+                with run_metrics.phase("database_inserts"):
+                    save_watchlist_cache(conn, cur)
+            else:
+                with run_metrics.phase("imdb_watchlists_init"):
+                    series_list, unknown_list = imdb_watchlists_init(cur)
+                with run_metrics.phase("database_inserts"):
+                    insert_series_to_db(conn, cur, series_list)
+                    insert_unique_unknown_ids(conn, cur, unknown_list)
+                    save_watchlist_cache(conn, cur)
+            with run_metrics.phase("get_thetvdb_ids"):
+                get_thetvdb_ids(conn, cur, force_tvdb_refresh)
+            with run_metrics.phase("sickchill_reconciliation"):
+                sickchill_tvdb_ids = get_sickchill_shows()
+                update_added_to_sickchill(conn, cur, sickchill_tvdb_ids)
+            with run_metrics.phase("add_series_to_sickchill"):
+                add_series_to_sickchill(conn, cur)
+
+# Validate a YYYY-MM-DD date given on the command line
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value}, expected YYYY-MM-DD")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -595,6 +2251,59 @@ if __name__ == "__main__":
         action="store_true",
         help="Display all series in the database"
     )
+    parser.add_argument(
+        "--format",
+        choices=["table", "json", "csv"],
+        default="table",
+        help="Output format of --showdb"
+    )
+    parser.add_argument(
+        "--show_type",
+        choices=["series", "unknown", "incomplete"],
+        help="Only display records of this type with --showdb"
+    )
+    parser.add_argument(
+        "--sickchill_status",
+        choices=["added", "pending"],
+        help="Only display records added to SickChill, or not added yet, with --showdb"
+    )
+    parser.add_argument(
+        "--missing_tvdb",
+        action="store_true",
+        help="Only display records without a TheTVDB ID with --showdb"
+    )
+    parser.add_argument(
+        "--watchlist",
+        help="Only display records imported from this watchlist URL with --showdb"
+    )
+    parser.add_argument(
+        "--since",
+        type=parse_date,
+        help="Only display records imported on or after this date with --showdb\n"
+             "Example: --since 2024-01-31"
+    )
+    parser.add_argument(
+        "--until",
+        type=parse_date,
+        help="Only display records imported on or before this date with --showdb\n"
+             "Example: --until 2024-12-31"
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="Maximum number of records displayed by --showdb"
+    )
+    parser.add_argument(
+        "--offset",
+        type=int,
+        default=0,
+        help="Number of records skipped by --showdb, used with --limit to page through the database"
+    )
+    parser.add_argument(
+        "--refresh_tvdb",
+        action="store_true",
+        help="Look up TheTVDB IDs of all series still missing one, ignoring the retry schedule"
+    )
     parser.add_argument(
         "--watchlist_urls",
         nargs="+",
@@ -627,19 +2336,109 @@ if __name__ == "__main__":
         type=int,
         help="Set the maximum size of the debug log file in megabytes"
     )
+    parser.add_argument(
+        "--imdb_workers",
+        type=int,
+        help="Number of concurrent workers used to classify IMDb titles\n"
+             "Example: --imdb_workers 8"
+    )
+    parser.add_argument(
+        "--sickchill_workers",
+        type=int,
+        help="Number of series submitted to SickChill at the same time (default: 4)\n"
+             "Example: --sickchill_workers 4"
+    )
+    parser.add_argument(
+        "--config",
+        help="Path to a JSON configuration file overriding the settings, and defining tenants\n"
+             "each with their own watchlists and SickChill\n"
+             'Example: --config "/config/sickadd.json"'
+    )
+    parser.add_argument(
+        "--tenant_watchlist_urls",
+        nargs="+",
+        metavar="URL",
+        help="Only process these watchlists of the tenants defined by --config, separated by commas"
+    )
+    parser.add_argument(
+        "--http_rate_limit",
+        type=float,
+        help="Maximum number of requests per second sent to each host, 0 to disable the limit\n"
+             "Example: --http_rate_limit 5"
+    )
+    parser.add_argument(
+        "--http_rate_burst",
+        type=float,
+        help="Number of requests that can be sent to a host at once before the rate limit applies"
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Process each new series through classification, TheTVDB lookup and SickChill as soon as it is found,\n"
+             "instead of completing each step for all series first"
+    )
+    parser.add_argument(
+        "--adaptive_polling",
+        action="store_true",
+        help="Only poll the watchlists which are due: a watchlist is polled less and less often while its IMDb IDs\n"
+             "don't change, and again every --watchlist_poll_min_minutes once they change"
+    )
+    parser.add_argument(
+        "--watchlist_poll_min_minutes",
+        type=float,
+        metavar="MINUTES",
+        help="Shortest interval between two polls of a watchlist with --adaptive_polling (default: 60)"
+    )
+    parser.add_argument(
+        "--watchlist_poll_max_minutes",
+        type=float,
+        metavar="MINUTES",
+        help="Longest interval between two polls of a watchlist with --adaptive_polling (default: 10080)"
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        metavar="N",
+        help="Process the watchlists in chunks of N IMDb IDs, checking them against the database chunk by chunk,\n"
+             "so the memory used doesn't grow with the size of the watchlists. 0 (default) processes them at once"
+    )
+    parser.add_argument(
+        "--report_path",
+        help='Path to the JSON report written at the end of each run, next to the database by default\n'
+             'Example: --report_path "/var/sickadd_report.json"'
+    )
+    parser.add_argument(
+        "--prometheus_textfile_path",
+        help='Path to a Prometheus textfile collector file updated at the end of each run\n'
+             'Example: --prometheus_textfile_path "/var/lib/node_exporter/sickadd.prom"'
+    )
 
     args = parser.parse_args()
 
+    # Settings given on the command line override the configuration file
+    if args.config:
+        load_config(args.config)
+
     if args.debug:
         settings["debug"] = 1
-        debug_log("Debug mode enabled")
         if args.debug_log_path:
             settings["debug_log_path"] = args.debug_log_path
 
+    if args.debug_max_size_mb:
+        settings["debug_max_size_mb"] = args.debug_max_size_mb
+
+    # Keep the standard output clean for the --showdb exports
+    setup_logging(sys.stderr if args.showdb and args.format != "table" else sys.stdout)
+    if args.debug:
+        debug_log("Debug mode enabled")
+
     if args.watchlist_urls:
         watchlist_urls = [url.strip() for url in ",".join(args.watchlist_urls).split(",")]
         settings["watchlist_urls"] = watchlist_urls
 
+    if args.tenant_watchlist_urls:
+        settings["tenant_watchlist_urls"] = [url.strip() for url in ",".join(args.tenant_watchlist_urls).split(",")]
+
     if args.sickchill_url:
         settings["sickchill_url"] = args.sickchill_url
 
@@ -649,13 +2448,61 @@ if __name__ == "__main__":
     if args.database_path:
         settings["database_path"] = args.database_path
 
+    if args.imdb_workers:
+        settings["imdb_workers"] = args.imdb_workers
+
+    if args.sickchill_workers:
+        settings["sickchill_workers"] = args.sickchill_workers
+
+    if args.http_rate_limit is not None:
+        settings["http_rate_limit"] = args.http_rate_limit
+
+    if args.http_rate_burst:
+        settings["http_rate_burst"] = args.http_rate_burst
+
+    if args.pipeline:
+        settings["pipeline"] = 1
+
+    if args.chunk_size is not None:
+        settings["chunk_size"] = args.chunk_size
+
+    if args.adaptive_polling:
+        settings["adaptive_polling"] = 1
+
+    if args.watchlist_poll_min_minutes is not None:
+        settings["watchlist_poll_min_minutes"] = args.watchlist_poll_min_minutes
+
+    if args.watchlist_poll_max_minutes is not None:
+        settings["watchlist_poll_max_minutes"] = args.watchlist_poll_max_minutes
+
+    if args.report_path:
+        settings["report_path"] = args.report_path
+
+    if args.prometheus_textfile_path:
+        settings["prometheus_textfile_path"] = args.prometheus_textfile_path
+
     if args.delete:
         conn, cur = setup_database()
         delete_series_from_db(conn, cur, args.delete)
         conn.close()
     elif args.showdb:
         conn, cur = setup_database()
-        show_db_content(cur)
+        filters = {
+            "show_type": args.show_type,
+            "sickchill_status": args.sickchill_status,
+            "missing_tvdb": args.missing_tvdb,
+            "watchlist": args.watchlist,
+            "since": args.since,
+            "until": args.until,
+        }
+        show_db_content(cur, filters, args.format, args.limit, args.offset)
         conn.close()
     else:
-        main()
+        run_lock = acquire_run_lock()
+        if run_lock is None:
+            debug_log("Another SickAdd run is in progress. SickAdd will now exit.", force=True)
+            sys.exit(1)
+        try:
+            main(force_tvdb_refresh=args.refresh_tvdb)
+        finally:
+            release_run_lock(run_lock)
@@ -0,0 +1,552 @@
+#!/usr/bin/env python
+#
+##################################################################################
+### SickAdd benchmark
+#
+# Runs SickAdd against local stand-in IMDb, TheTVDB and SickChill servers and reports, for each phase of a run,
+# the wall time, the number of requests and bytes served by each fake server and the number of SQLite commits.
+# The bytes read by SickAdd from each server are taken from the per-host counters of its run report, the bytes served
+# also count what the kernel buffered for connections SickAdd closed early.
+#
+# With --full_title_pages, IMDb title pages are read whole instead of up to their <title>, as SickAdd did before it
+# streamed them, to measure what streaming saves:
+#   python benchmark.py --watchlists 1 --titles 100
+#   python benchmark.py --watchlists 1 --titles 100 --full_title_pages
+#
+# With --per_row_writes, the watchlist items are inserted with a SELECT, an INSERT and a commit per row into a rollback
+# journal database, as SickAdd did before it batched its writes, to measure what batching saves:
+#   python benchmark.py --watchlists 1 --titles 15000 --layout jsonld
+#   python benchmark.py --watchlists 1 --titles 15000 --layout jsonld --per_row_writes
+#
+# With --startup, the matrix is replaced by a micro-benchmark of the start of SickAdd, which imports requests with its
+# first HTTP session, and of the TheTVDB response parser against the BeautifulSoup parser it replaced (when bs4 and lxml
+# are installed): python benchmark.py --startup
+#
+# Every combination of --watchlists and --titles is run twice on the same database: "cold" on a new database,
+# then "warm" with the database and watchlist cache left by the cold run.
+#
+# The peak resident set size (RSS) of each run is reported where Linux lets the benchmark reset it, with its growth over
+# the RSS before the run, the fake servers share the process and are part of both.
+# With --memory, the peak memory allocated by Python during each run is traced as well (which slows the runs down).
+#
+# Example: python benchmark.py --watchlists 1 5 --titles 100 1000 --latency_ms 20 --error_rate 0.01
+###########################################################
+import argparse
+import contextlib
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import SickAdd
+
+# SickAdd functions timed as the phases of a run, in the order main() calls them
+PHASES = [
+    "check_watchlists",
+    "check_sickchill",
+    "check_thetvdb",
+    "imdb_watchlists_init",
+    "imdb_watchlists_init_chunked",
+    "insert_series_to_db",
+    "insert_unique_unknown_ids",
+    "get_thetvdb_ids",
+    "get_sickchill_shows",
+    "update_added_to_sickchill",
+    "add_series_to_sickchill",
+    "run_pipeline",
+]
+
+# Number of items on each page of a fake IMDb list
+LIST_PAGE_SIZE = 250
+
+
+# Catalog shared by the fake servers
+class Catalog:
+    def __init__(self, watchlists, titles, sickchill_shows, layout):
+        self.layout = layout
+        # Consecutive watchlists share half of their titles
+        self.watchlists = {
+            f"ls{1000000 + n}": [f"tt{1000000 + n * titles // 2 + i}" for i in range(titles)]
+            for n in range(watchlists)
+        }
+        all_titles = sorted({imdb_id for imdb_ids in self.watchlists.values() for imdb_id in imdb_ids})
+        self.sickchill_shows = {
+            self.get_thetvdb_id(imdb_id) for imdb_id in all_titles[:sickchill_shows]
+            if self.is_series(imdb_id) and self.get_thetvdb_id(imdb_id) is not None
+        }
+        self.sickchill_lock = threading.Lock()
+        # Time of the first show.addnew request of the current run
+        self.first_add_time = None
+
+    # Two thirds of the titles are TV series
+    @staticmethod
+    def is_series(imdb_id):
+        return int(imdb_id[2:]) % 3 != 0
+
+    # One TV series out of ten is unknown to TheTVDB
+    @staticmethod
+    def get_thetvdb_id(imdb_id):
+        number = int(imdb_id[2:])
+        return None if number % 10 == 1 else number
+
+
+# Request handler of the fake servers, the server attributes hold the catalog, counters and fault settings
+# The bytes counted are the bytes written to the socket, which includes what the kernel buffered for a client that closed early
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type="text/html; charset=utf-8"):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # Count the request and each chunk before SickAdd can receive them, so they are charged to the phase which sent them
+        # A chunk that couldn't be written is taken back, SickAdd stops reading title pages once it has their title
+        with self.server.counter_lock:
+            self.server.requests += 1
+        try:
+            for offset in range(0, len(body), 65536):
+                chunk = body[offset:offset + 65536]
+                with self.server.counter_lock:
+                    self.server.bytes += len(chunk)
+                try:
+                    self.wfile.write(chunk)
+                except BaseException:
+                    with self.server.counter_lock:
+                        self.server.bytes -= len(chunk)
+                    raise
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            return self.send_body(503, "Service Unavailable")
+
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        status, body, content_type = self.server.route(url.path, query)
+        self.send_body(status, body, content_type)
+
+
+# Threaded HTTP server bound to a random localhost port
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, catalog, latency, error_rate):
+        super().__init__(("127.0.0.1", 0), FakeHandler)
+        self.catalog = catalog
+        self.latency = latency
+        self.error_rate = error_rate
+        self.counter_lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def handle_error(self, request, client_address):
+        # SickAdd closes title page connections early, those resets are expected
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    def counters(self):
+        with self.counter_lock:
+            return self.requests, self.bytes
+
+    def route(self, path, query):
+        return 404, "Not Found", "text/plain"
+
+
+# Fake IMDb: list pages in the JSON-LD or legacy layout, and title pages
+class FakeIMDb(FakeServer):
+    def route(self, path, query):
+        match = re.match(r"/list/(ls\d+)", path)
+        if match and match.group(1) in self.catalog.watchlists:
+            return self.list_page(match.group(1), int(query.get("page", 1)))
+        match = re.match(r"/title/(tt\d+)/", path)
+        if match:
+            imdb_id = match.group(1)
+            kind = "TV Series 2010-2015" if self.catalog.is_series(imdb_id) else "2010"
+            # Real title pages weigh several hundred kilobytes, the title comes first
+            body = f"<html><head><title>Title {imdb_id} ({kind}) - IMDb</title></head><body>{'x' * 300000}</body></html>"
+            return 200, body, "text/html; charset=utf-8"
+        return 404, "Not Found", "text/plain"
+
+    def list_page(self, list_id, page):
+        imdb_ids = self.catalog.watchlists[list_id]
+        page_ids = imdb_ids[(page - 1) * LIST_PAGE_SIZE:page * LIST_PAGE_SIZE]
+        if self.catalog.layout == "jsonld":
+            data = {
+                "@type": "ItemList",
+                "numberOfItems": len(imdb_ids),
+                "itemListElement": [
+                    {"@type": "ListItem", "item": {
+                        "@type": "TVSeries" if self.catalog.is_series(imdb_id) else "Movie",
+                        "url": f"https://www.imdb.com/title/{imdb_id}/",
+                        "name": f"Title {imdb_id}",
+                    }}
+                    for imdb_id in page_ids
+                ],
+            }
+            body = f'<html><head><script type="application/ld+json">{json.dumps(data)}</script></head><body></body></html>'
+        else:
+            items = "".join(
+                f'<div class="lister-item"><h3 class="lister-item-header"><a href="/title/{imdb_id}/">Title {imdb_id}</a></h3></div>'
+                for imdb_id in page_ids
+            )
+            next_page = ""
+            if page * LIST_PAGE_SIZE < len(imdb_ids):
+                next_page = f'<a class="flat-button lister-page-next next-page" href="/list/{list_id}/?page={page + 1}">Next</a>'
+            body = f"<html><body>{items}{next_page}</body></html>"
+        return 200, body, "text/html; charset=utf-8"
+
+
+# Fake TheTVDB: the legacy GetSeriesByRemoteID.php XML endpoint
+class FakeTheTVDB(FakeServer):
+    def route(self, path, query):
+        if path != "/api/GetSeriesByRemoteID.php":
+            return 404, "Not Found", "text/plain"
+        thetvdb_id = self.catalog.get_thetvdb_id(query.get("imdbid", "tt0"))
+        if thetvdb_id is None:
+            return 200, '<?xml version="1.0" encoding="UTF-8" ?><Data></Data>', "text/xml"
+        body = f'<?xml version="1.0" encoding="UTF-8" ?><Data><Series><seriesid>{thetvdb_id}</seriesid><id>{thetvdb_id}</id></Series></Data>'
+        return 200, body, "text/xml"
+
+
+# Fake SickChill: the shows and show.addnew API commands
+class FakeSickChill(FakeServer):
+    def route(self, path, query):
+        if not path.startswith("/api/"):
+            return 404, "Not Found", "text/plain"
+        command = query.get("cmd")
+        with self.catalog.sickchill_lock:
+            if command == "shows":
+                # SickChill answers with an empty data object when it has no show, SickAdd reads it as a wrong API key
+                shows = self.catalog.sickchill_shows or {0}
+                data = {str(thetvdb_id): {"tvdbid": thetvdb_id, "show_name": f"Show {thetvdb_id}"} for thetvdb_id in shows}
+                return 200, json.dumps({"result": "success", "data": data}), "application/json"
+            if command == "show.addnew":
+                self.catalog.sickchill_shows.add(int(query.get("indexerid", 0)))
+                if self.catalog.first_add_time is None:
+                    self.catalog.first_add_time = time.perf_counter()
+                return 200, json.dumps({"result": "success", "data": {}}), "application/json"
+        return 200, json.dumps({"result": "failure"}), "application/json"
+
+
+# Return a memory field of /proc/self/status such as VmRSS or VmHWM in bytes, None where it isn't available
+def read_memory_status(field):
+    try:
+        with open("/proc/self/status") as status_file:
+            match = re.search(rf"^{field}:\s+(\d+) kB", status_file.read(), re.M)
+    except OSError:
+        return None
+    return int(match.group(1)) * 1024 if match else None
+
+
+# Reset the peak RSS (VmHWM) of the process to its current RSS, returns False where it can't be reset
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs_file:
+            clear_refs_file.write("5")
+    except OSError:
+        return False
+    return True
+
+
+# Read a whole title page, as SickAdd did before read_until_title, used by --full_title_pages
+def read_whole_title_page(response, chunk_size=16384):
+    content = response.content
+    response.close()
+    SickAdd.run_metrics.record_bytes(response.url, len(content))
+    return content.decode(response.encoding or "utf-8", errors="replace")
+
+
+# Insert watchlist items one row at a time, as SickAdd did before it batched its writes, used by --per_row_writes
+def insert_shows_per_row(conn, cur, show_list, show_type):
+    for show in show_list:
+        cur.execute("SELECT * FROM shows WHERE imdb_id=?", (show["imdb_id"],))
+        if not cur.fetchone():
+            cur.execute(
+                "INSERT INTO shows (imdb_id, title, watchlist_url, imdb_import_date, added_to_sickchill, show_type) VALUES (?, ?, ?, ?, ?, ?)",
+                (show["imdb_id"], show["title"], show["watchlist_url"], time.strftime("%Y-%m-%d"), 0, show_type),
+            )
+            conn.commit()
+
+
+def insert_series_per_row(conn, cur, series_list):
+    insert_shows_per_row(conn, cur, series_list, 1)
+
+
+def insert_unknown_ids_per_row(conn, cur, unknown_list):
+    insert_shows_per_row(conn, cur, unknown_list, 0)
+
+
+# Run SickAdd once and collect the measures of each phase
+def run_sickadd(servers, catalog, database_path, trace_memory=False):
+    measures = {phase: {"seconds": 0.0, "commits": 0, "requests": {}, "bytes": {}} for phase in PHASES}
+    commits = [0]
+
+    def count_commits(statement):
+        if statement.strip().upper().startswith("COMMIT"):
+            commits[0] += 1
+
+    # Wrap the phases of main() to measure them
+    originals = {phase: getattr(SickAdd, phase) for phase in PHASES}
+
+    def measure(phase, function):
+        def wrapper(*args, **kwargs):
+            counters = {name: server.counters() for name, server in servers.items()}
+            commit_count = commits[0]
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                phase_measure = measures[phase]
+                phase_measure["seconds"] += time.perf_counter() - start_time
+                phase_measure["commits"] += commits[0] - commit_count
+                for name, server in servers.items():
+                    requests, sent_bytes = server.counters()
+                    phase_measure["requests"][name] = phase_measure["requests"].get(name, 0) + requests - counters[name][0]
+                    phase_measure["bytes"][name] = phase_measure["bytes"].get(name, 0) + sent_bytes - counters[name][1]
+        return wrapper
+
+    for phase, function in originals.items():
+        setattr(SickAdd, phase, measure(phase, function))
+
+    conn, cur = SickAdd.setup_database()
+    conn.set_trace_callback(count_commits)
+    catalog.first_add_time = None
+    start_rss = read_memory_status("VmRSS") if reset_peak_rss() else None
+    if trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        SickAdd.main(conn=conn, cur=cur)
+        status = "ok"
+    except SystemExit:
+        status = "exit"
+    finally:
+        wall_time = time.perf_counter() - start_time
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        tracemalloc.stop()
+        peak_rss = read_memory_status("VmHWM") if start_rss is not None else None
+        conn.close()
+        for phase, function in originals.items():
+            setattr(SickAdd, phase, function)
+
+    # Bytes read by SickAdd, from the per-host counters of its run report
+    hosts = SickAdd.run_metrics.to_dict()["hosts"]
+    read_bytes = {name: hosts.get(urlsplit(server.url).netloc, {}).get("bytes", 0) for name, server in servers.items()}
+
+    first_add_seconds = catalog.first_add_time - start_time if catalog.first_add_time is not None else None
+    return {"status": status, "wall_seconds": wall_time, "first_add_seconds": first_add_seconds, "commits": commits[0],
+            "peak_memory_bytes": peak_memory, "start_rss_bytes": start_rss, "peak_rss_bytes": peak_rss, "read_bytes": read_bytes,
+            "phases": measures}
+
+
+# Run the benchmark matrix, returns one result per watchlists x titles x cold/warm combination
+def run_benchmark(args):
+    results = []
+    work_directory = tempfile.mkdtemp(prefix="sickadd-benchmark-")
+    devnull = open(os.devnull, "w")
+    replaced_functions = {}
+    if args.full_title_pages:
+        replaced_functions["read_until_title"] = read_whole_title_page
+    if args.per_row_writes:
+        replaced_functions.update(insert_series_to_db=insert_series_per_row, insert_unique_unknown_ids=insert_unknown_ids_per_row)
+    original_functions = {name: getattr(SickAdd, name) for name in replaced_functions}
+    journal_mode = "" if args.per_row_writes else SickAdd.settings["database_journal_mode"]
+    for name, function in replaced_functions.items():
+        setattr(SickAdd, name, function)
+    try:
+        for watchlists in args.watchlists:
+            for titles in args.titles:
+                catalog = Catalog(watchlists, titles, args.sickchill_shows, args.layout)
+                servers = {
+                    "imdb": FakeIMDb(catalog, args.latency_ms / 1000, args.error_rate),
+                    "thetvdb": FakeTheTVDB(catalog, args.latency_ms / 1000, args.error_rate),
+                    "sickchill": FakeSickChill(catalog, args.latency_ms / 1000, args.error_rate),
+                }
+                database_path = os.path.join(work_directory, f"sickadd_{watchlists}_{titles}.db")
+                SickAdd.settings.update({
+                    "watchlist_urls": [f"{servers['imdb'].url}/list/{list_id}" for list_id in catalog.watchlists],
+                    "imdb_url": servers["imdb"].url,
+                    "thetvdb_url": servers["thetvdb"].url,
+                    "sickchill_url": servers["sickchill"].url,
+                    "sickchill_api_key": "benchmark",
+                    "database_path": database_path,
+                    "debug_log_path": os.path.join(work_directory, "sickadd.log"),
+                    "debug": 1 if args.debug else 0,
+                    "imdb_workers": args.imdb_workers,
+                    "sickchill_workers": args.sickchill_workers,
+                    "http_backoff": 0.05,
+                    "pipeline": 1 if args.pipeline else 0,
+                    "http_rate_limit": args.rate_limit,
+                    "chunk_size": args.chunk_size,
+                    "database_journal_mode": journal_mode,
+                })
+                # Keep the console for the benchmark results unless debug output is requested
+                with contextlib.redirect_stdout(sys.stdout if args.debug else devnull):
+                    SickAdd.setup_logging()
+
+                for database_state in ("cold", "warm"):
+                    result = run_sickadd(servers, catalog, database_path, args.memory)
+                    result.update({"watchlists": watchlists, "titles": titles, "database": database_state})
+                    results.append(result)
+                    print_result(result)
+
+                for server in servers.values():
+                    server.shutdown()
+                    server.server_close()
+    finally:
+        for name, function in original_functions.items():
+            setattr(SickAdd, name, function)
+        SickAdd.stop_logging()
+        devnull.close()
+        shutil.rmtree(work_directory, ignore_errors=True)
+    return results
+
+
+# Print the measures of one run as a table
+def print_result(result):
+    first_add = f"{result['first_add_seconds']:.2f}s" if result["first_add_seconds"] is not None else "none"
+    peak_memory = f" - peak memory: {result['peak_memory_bytes'] / 1048576:.1f} MiB" if result["peak_memory_bytes"] is not None else ""
+    if result["peak_rss_bytes"] is not None:
+        peak_memory += (f" - peak RSS: {result['peak_rss_bytes'] / 1048576:.1f} MiB"
+                        f" (+{(result['peak_rss_bytes'] - result['start_rss_bytes']) / 1048576:.1f} MiB)")
+    print(f"\n{result['watchlists']} watchlists x {result['titles']} titles - {result['database']} database - "
+          f"{result['wall_seconds']:.2f}s - first add: {first_add} - {result['commits']} commits{peak_memory} - status: {result['status']}")
+    print("  bytes read by SickAdd: " + " - ".join(f"{name} {read_bytes}" for name, read_bytes in result["read_bytes"].items()))
+    print(f"  {'phase':<28}{'seconds':>9}{'commits':>9}{'imdb req':>10}{'tvdb req':>10}{'sc req':>8}{'bytes served':>14}")
+    for phase, measure in result["phases"].items():
+        requests = measure["requests"]
+        print(f"  {phase:<28}{measure['seconds']:>9.3f}{measure['commits']:>9}{requests.get('imdb', 0):>10}"
+              f"{requests.get('thetvdb', 0):>10}{requests.get('sickchill', 0):>8}{sum(measure['bytes'].values()):>14}")
+
+
+# TheTVDB GetSeriesByRemoteID.php responses parsed by the --startup micro-benchmark
+THETVDB_RESPONSES = {
+    "series found": b'<?xml version="1.0" encoding="UTF-8" ?><Data><Series><seriesid>81189</seriesid><language>en</language>'
+                    b'<SeriesName>Breaking Bad</SeriesName><IMDB_ID>tt0903747</IMDB_ID><id>81189</id></Series></Data>',
+    "no series": b'<?xml version="1.0" encoding="UTF-8" ?><Data></Data>',
+}
+
+
+# Parse a TheTVDB response with BeautifulSoup, as SickAdd did before parse_thetvdb_series_id
+def parse_thetvdb_series_id_with_beautifulsoup(content):
+    from bs4 import BeautifulSoup
+    series = BeautifulSoup(content, "lxml-xml").find("Series")
+    if series is None or series.find("id") is None:
+        return None
+    return series.find("id").text
+
+
+# Median wall time in seconds of a command run in a new process
+def time_command(command, runs, cwd):
+    durations = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start_time)
+    return statistics.median(durations)
+
+
+# Time the start of SickAdd in new processes, and the parse of TheTVDB responses
+def run_startup_benchmark(args):
+    work_directory = tempfile.mkdtemp(prefix="sickadd-benchmark-")
+    sickadd_path = os.path.abspath(SickAdd.__file__)
+    # The SickAdd directory goes first on the import path, the log file and the database stay in the work directory
+    import_prefix = f"import sys; sys.path.insert(0, {os.path.dirname(sickadd_path)!r}); "
+    try:
+        import bs4
+        import lxml
+        beautifulsoup_available = True
+    except ImportError:
+        beautifulsoup_available = False
+
+    commands = {
+        "bare interpreter": [sys.executable, "-c", "pass"],
+        "import SickAdd": [sys.executable, "-c", import_prefix + "import SickAdd"],
+        "import SickAdd, requests and bs4 eagerly": [sys.executable, "-c", import_prefix + "import requests, requests.adapters, bs4, SickAdd"],
+        "SickAdd.py --showdb --limit 1": [sys.executable, sickadd_path, "--showdb", "--limit", "1", "--database_path", os.path.join(work_directory, "sickadd.db")],
+    }
+    if not beautifulsoup_available:
+        del commands["import SickAdd, requests and bs4 eagerly"]
+    try:
+        print(f"Startup, median of {args.startup_runs} runs:")
+        for name, command in commands.items():
+            print(f"  {name:<44}{time_command(command, args.startup_runs, work_directory) * 1000:>9.1f} ms")
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+    parsers = {"ElementTree": SickAdd.parse_thetvdb_series_id}
+    if beautifulsoup_available:
+        parsers["BeautifulSoup"] = parse_thetvdb_series_id_with_beautifulsoup
+    else:
+        print("BeautifulSoup or lxml is not installed, only the ElementTree parser is timed")
+    print("TheTVDB response parse, best of 5 x 5000 parses:")
+    for response_name, content in THETVDB_RESPONSES.items():
+        for parser_name, parse in parsers.items():
+            best_time = min(timeit.repeat(lambda: parse(content), repeat=5, number=5000)) / 5000
+            print(f"  {response_name + ', ' + parser_name:<44}{best_time * 1000000:>9.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark SickAdd against local stand-in IMDb, TheTVDB and SickChill servers",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument("--watchlists", type=int, nargs="+", default=[1, 3], help="Numbers of watchlists to benchmark")
+    parser.add_argument("--titles", type=int, nargs="+", default=[100, 500], help="Numbers of titles per watchlist to benchmark")
+    parser.add_argument("--sickchill_shows", type=int, default=50, help="Number of catalog titles already in SickChill")
+    parser.add_argument("--layout", choices=["legacy", "jsonld"], default="legacy",
+                        help="Layout of the fake IMDb list pages, legacy pages don't carry the title types")
+    parser.add_argument("--latency_ms", type=float, default=0, help="Latency added to every fake server response")
+    parser.add_argument("--error_rate", type=float, default=0, help="Share of fake server responses replaced by a 503 error")
+    parser.add_argument("--imdb_workers", type=int, default=SickAdd.settings["imdb_workers"], help="SickAdd imdb_workers setting")
+    parser.add_argument("--sickchill_workers", type=int, default=SickAdd.settings["sickchill_workers"], help="SickAdd sickchill_workers setting")
+    parser.add_argument("--rate_limit", type=float, default=0, help="SickAdd http_rate_limit setting, unlimited by default")
+    parser.add_argument("--pipeline", action="store_true", help="Run SickAdd in pipeline mode")
+    parser.add_argument("--chunk_size", type=int, default=0, help="SickAdd chunk_size setting, chunked mode is disabled by default")
+    parser.add_argument("--full_title_pages", action="store_true",
+                        help="Read whole IMDb title pages instead of stopping after their <title>, to compare the bytes read")
+    parser.add_argument("--per_row_writes", action="store_true",
+                        help="Insert the watchlist items with a commit per row into a rollback journal database, to compare with batched writes")
+    parser.add_argument("--memory", action="store_true", help="Trace the peak memory allocated by Python during each run")
+    parser.add_argument("--startup", action="store_true",
+                        help="Time the start of SickAdd and the parse of TheTVDB responses instead of running the benchmark matrix")
+    parser.add_argument("--startup_runs", type=int, default=15, help="Number of processes started for each --startup measure")
+    parser.add_argument("--json", metavar="PATH", help="Write the results to a JSON file")
+    parser.add_argument("--debug", action="store_true", help="Enable SickAdd debug output")
+    args = parser.parse_args()
+
+    if args.startup:
+        run_startup_benchmark(args)
+        sys.exit(0)
+
+    results = run_benchmark(args)
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+        print(f"\nResults written to {args.json}")
+    sys.exit(0 if all(result["status"] == "ok" for result in results) else 1)
@@ -1,18 +1,104 @@
 import os
+import json
 import time
+import shlex
+import signal
 import subprocess
+import threading
 import schedule
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# Process started by the last scheduled run in subprocess mode
+proc = None
+
+# Prevents two daemon runs from overlapping
+run_lock = threading.Lock()
+
+# Objects kept open between daemon runs
+sickadd = None
+sickadd_conn = None
+sickadd_cur = None
+
+def is_enabled(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def get_watchlist_urls():
+    return [url.strip() for url in os.environ.get('WATCHLIST_URLS', '').split(",") if url.strip()]
+
+# Watchlists of the tenants defined in the CONFIG_PATH configuration file, empty without tenants
+def get_tenant_watchlist_urls():
+    config_path = os.environ.get('CONFIG_PATH')
+    if not config_path:
+        return []
+    try:
+        with open(config_path) as config_file:
+            config = json.load(config_file)
+    except (OSError, ValueError) as e:
+        print(f"Unable to read the configuration file {config_path}: {e}")
+        return []
+
+    watchlist_urls = []
+    for tenant in config.get("tenants", []):
+        tenant_urls = tenant.get("watchlist_urls", [])
+        if isinstance(tenant_urls, str):
+            tenant_urls = tenant_urls.split(",")
+        for url in tenant_urls:
+            if url.strip() and url.strip() not in watchlist_urls:
+                watchlist_urls.append(url.strip())
+    return watchlist_urls
+
+# Watchlists a sync can be limited to: those of the tenants in tenants mode, otherwise WATCHLIST_URLS
+def get_sync_watchlist_urls():
+    return get_tenant_watchlist_urls() or get_watchlist_urls()
+
+# Run SickAdd in a new process, on the given watchlists only if watchlist_urls is set
+# A forced run polls its watchlists even if adaptive polling doesn't consider them due
+def run_sickadd(watchlist_urls=None, forced=False):
+    global proc
+
+    # Skip this run if the previous one is still in progress
+    if proc is not None and proc.poll() is None:
+        print("Previous SickAdd run is still in progress, skipping this run")
+        return
 
-def run_sickadd():
-    watchlist_urls = os.environ.get('WATCHLIST_URLS')
     sickchill_url = os.environ.get('SICKCHILL_URL')
     sickchill_api_key = os.environ.get('SICKCHILL_API_KEY')
-    debug_enabled = os.environ.get('DEBUG_ENABLED', 'false').lower() == 'true'
+    debug_enabled = is_enabled(os.environ.get('DEBUG_ENABLED', 'false'))
     database_path = os.environ.get('DATABASE_PATH')
     debug_log_path = os.environ.get('DEBUG_LOG_PATH')
     debug_max_size_mb = os.environ.get('DEBUG_MAX_SIZE_MB')
+    imdb_workers = os.environ.get('IMDB_WORKERS')
+    sickchill_workers = os.environ.get('SICKCHILL_WORKERS')
+    report_path = os.environ.get('REPORT_PATH')
+    prometheus_textfile_path = os.environ.get('PROMETHEUS_TEXTFILE_PATH')
+    pipeline_enabled = is_enabled(os.environ.get('PIPELINE_MODE', 'false'))
+    http_rate_limit = os.environ.get('HTTP_RATE_LIMIT')
+    config_path = os.environ.get('CONFIG_PATH')
+    http_rate_burst = os.environ.get('HTTP_RATE_BURST')
+    chunk_size = os.environ.get('CHUNK_SIZE')
+    adaptive_polling = is_enabled(os.environ.get('ADAPTIVE_POLLING', 'false'))
+    watchlist_poll_min_minutes = os.environ.get('WATCHLIST_POLL_MIN_MINUTES')
+    watchlist_poll_max_minutes = os.environ.get('WATCHLIST_POLL_MAX_MINUTES')
+
+    # In tenants mode the run is limited to the given watchlists of the tenants
+    tenant_watchlist_urls = None
+    if watchlist_urls is None:
+        watchlist_urls = os.environ.get('WATCHLIST_URLS')
+    elif get_tenant_watchlist_urls():
+        tenant_watchlist_urls = shlex.quote(",".join(watchlist_urls))
+        watchlist_urls = os.environ.get('WATCHLIST_URLS')
+    else:
+        watchlist_urls = shlex.quote(",".join(watchlist_urls))
+
+    cmd = f"python SickAdd.py --sickchill_url {sickchill_url} --sickchill_api_key {sickchill_api_key}"
 
-    cmd = f"python SickAdd.py --watchlist_urls {watchlist_urls} --sickchill_url {sickchill_url} --sickchill_api_key {sickchill_api_key}"
+    # WATCHLIST_URLS can be left empty in tenants mode
+    if watchlist_urls:
+        cmd += f" --watchlist_urls {watchlist_urls}"
+
+    if tenant_watchlist_urls:
+        cmd += f" --tenant_watchlist_urls {tenant_watchlist_urls}"
 
     if debug_enabled:
         cmd += " --debug"
@@ -25,16 +111,247 @@ def run_sickadd():
 
     if debug_max_size_mb:
         cmd += f" --debug_max_size_mb {debug_max_size_mb}"
-        
+
+    if imdb_workers:
+        cmd += f" --imdb_workers {imdb_workers}"
+
+    if sickchill_workers:
+        cmd += f" --sickchill_workers {sickchill_workers}"
+
+    if config_path:
+        cmd += f" --config {config_path}"
+
+    if http_rate_limit:
+        cmd += f" --http_rate_limit {http_rate_limit}"
+
+    if http_rate_burst:
+        cmd += f" --http_rate_burst {http_rate_burst}"
+
+    if pipeline_enabled:
+        cmd += " --pipeline"
+
+    if chunk_size:
+        cmd += f" --chunk_size {chunk_size}"
+
+    if adaptive_polling and not forced:
+        cmd += " --adaptive_polling"
+
+    if watchlist_poll_min_minutes:
+        cmd += f" --watchlist_poll_min_minutes {watchlist_poll_min_minutes}"
+
+    if watchlist_poll_max_minutes:
+        cmd += f" --watchlist_poll_max_minutes {watchlist_poll_max_minutes}"
+
+    if report_path:
+        cmd += f" --report_path {report_path}"
+
+    if prometheus_textfile_path:
+        cmd += f" --prometheus_textfile_path {prometheus_textfile_path}"
+
     print(f"Command to execute: {cmd}")
     proc = subprocess.Popen(cmd, shell=True)
 
+# Import SickAdd once and apply the settings from the environment
+def setup_sickadd_daemon():
+    global sickadd
+    import SickAdd as sickadd
+
+    settings = sickadd.settings
+    if os.environ.get('CONFIG_PATH'):
+        sickadd.load_config(os.environ['CONFIG_PATH'])
+
+    settings["watchlist_urls"] = get_watchlist_urls()
+    settings["sickchill_url"] = os.environ.get('SICKCHILL_URL', settings["sickchill_url"])
+    settings["sickchill_api_key"] = os.environ.get('SICKCHILL_API_KEY', settings["sickchill_api_key"])
+
+    if is_enabled(os.environ.get('DEBUG_ENABLED', 'false')):
+        settings["debug"] = 1
+
+    for setting, variable in (("database_path", 'DATABASE_PATH'), ("debug_log_path", 'DEBUG_LOG_PATH'), ("debug_max_size_mb", 'DEBUG_MAX_SIZE_MB'),
+                              ("report_path", 'REPORT_PATH'), ("prometheus_textfile_path", 'PROMETHEUS_TEXTFILE_PATH')):
+        if os.environ.get(variable):
+            settings[setting] = os.environ[variable]
+
+    if os.environ.get('IMDB_WORKERS'):
+        settings["imdb_workers"] = int(os.environ['IMDB_WORKERS'])
+
+    if os.environ.get('SICKCHILL_WORKERS'):
+        settings["sickchill_workers"] = int(os.environ['SICKCHILL_WORKERS'])
+
+    for setting, variable in (("http_rate_limit", 'HTTP_RATE_LIMIT'), ("http_rate_burst", 'HTTP_RATE_BURST')):
+        if os.environ.get(variable):
+            settings[setting] = float(os.environ[variable])
+
+    if is_enabled(os.environ.get('PIPELINE_MODE', 'false')):
+        settings["pipeline"] = 1
+
+    if os.environ.get('CHUNK_SIZE'):
+        settings["chunk_size"] = int(os.environ['CHUNK_SIZE'])
+
+    if is_enabled(os.environ.get('ADAPTIVE_POLLING', 'false')):
+        settings["adaptive_polling"] = 1
+
+    for setting, variable in (("watchlist_poll_min_minutes", 'WATCHLIST_POLL_MIN_MINUTES'), ("watchlist_poll_max_minutes", 'WATCHLIST_POLL_MAX_MINUTES')):
+        if os.environ.get(variable):
+            settings[setting] = float(os.environ[variable])
+
+    sickadd.setup_logging()
+    signal.signal(signal.SIGTERM, stop_sickadd_daemon)
+
+# Stop the daemon on SIGTERM (docker stop), atexit handlers don't run on a signal, so the log lines still queued for the
+# log file are written first. An interrupted run resumes from its checkpoints on the next start
+def stop_sickadd_daemon(signum, frame):
+    sickadd.debug_log("SickAdd daemon stopped by signal %s", signum, force=True)
+    sickadd.stop_logging()
+    os._exit(128 + signum)
+
+# Run SickAdd in this process, keeping the database connection and HTTP connection pools open between runs
+# The run is limited to the given watchlists if watchlist_urls is set, a forced run polls them even if they aren't due
+def run_sickadd_daemon(watchlist_urls=None, forced=False):
+    global sickadd_conn, sickadd_cur
+
+    if not run_lock.acquire(blocking=False):
+        print("Previous SickAdd run is still in progress, skipping this run")
+        return
+
+    start_time = time.monotonic()
+    file_lock = None
+    saved_settings = {key: sickadd.settings[key] for key in ("watchlist_urls", "tenant_watchlist_urls", "adaptive_polling")}
+    if watchlist_urls is not None:
+        sickadd.settings["tenant_watchlist_urls" if sickadd.settings["tenants"] else "watchlist_urls"] = watchlist_urls
+    if forced:
+        sickadd.settings["adaptive_polling"] = 0
+    try:
+        # The lock file also protects against a SickAdd run started outside of the launcher
+        file_lock = sickadd.acquire_run_lock()
+        if file_lock is None:
+            sickadd.debug_log("Another SickAdd run is in progress, skipping this run", force=True)
+            return
+
+        if sickadd_conn is None:
+            sickadd_conn, sickadd_cur = sickadd.setup_database()
+        sickadd.main(conn=sickadd_conn, cur=sickadd_cur)
+        sickadd.debug_log("SickAdd run completed in %.1f seconds", time.monotonic() - start_time, force=True)
+    except SystemExit:
+        sickadd.debug_log("SickAdd run stopped after %.1f seconds", time.monotonic() - start_time, force=True)
+    except Exception as e:
+        sickadd.debug_log("SickAdd run failed after %.1f seconds: %r", time.monotonic() - start_time, e, force=True)
+        # Reopen the database connection on the next run
+        if sickadd_conn is not None:
+            sickadd_conn.close()
+            sickadd_conn, sickadd_cur = None, None
+    finally:
+        sickadd.settings.update(saved_settings)
+        if file_lock is not None:
+            sickadd.release_run_lock(file_lock)
+        run_lock.release()
+
+# Watchlists of the syncs requested through the trigger endpoint, merged into one run once no trigger arrived for
+# TRIGGER_DEBOUNCE_SECONDS, or TRIGGER_MAX_DELAY_SECONDS after the first one. None in "urls" stands for all the watchlists
+trigger_lock = threading.Lock()
+trigger_event = threading.Event()
+pending_trigger = {"urls": set(), "first": None, "last": None}
+trigger_debounce = float(os.environ.get('TRIGGER_DEBOUNCE_SECONDS', 5))
+trigger_max_delay = float(os.environ.get('TRIGGER_MAX_DELAY_SECONDS', 60))
+
+def request_sync(watchlist_url=None):
+    with trigger_lock:
+        now = time.monotonic()
+        pending_trigger["urls"].add(watchlist_url)
+        if pending_trigger["first"] is None:
+            pending_trigger["first"] = now
+        pending_trigger["last"] = now
+    trigger_event.set()
+
+# Seconds until the pending triggered sync is due, None if there is none
+def get_trigger_delay():
+    with trigger_lock:
+        if not pending_trigger["urls"]:
+            return None
+        now = time.monotonic()
+        return max(0.0, min(pending_trigger["last"] + trigger_debounce, pending_trigger["first"] + trigger_max_delay) - now)
+
+# Run the pending triggered sync if it is due, it waits for the end of a SickAdd process still running
+def run_triggered_sync():
+    delay = get_trigger_delay()
+    if delay is None or delay > 0 or (proc is not None and proc.poll() is None):
+        return
+
+    with trigger_lock:
+        urls = pending_trigger["urls"]
+        pending_trigger.update(urls=set(), first=None, last=None)
+
+    if None in urls:
+        print("Running the sync requested through the trigger endpoint for all watchlists")
+        run_job(forced=True)
+    else:
+        # Keep the order of the configuration
+        watchlist_urls = [url for url in get_sync_watchlist_urls() if url in urls]
+        print(f"Running the sync requested through the trigger endpoint for {', '.join(watchlist_urls)}")
+        run_job(watchlist_urls, forced=True)
+
+# Trigger endpoint: POST /sync requests a sync of all watchlists, POST /sync?url=<watchlist URL> of the given watchlists only
+class TriggerHandler(BaseHTTPRequestHandler):
+    def send_text(self, status, text):
+        body = f"{text}\n".encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        if parts.path.rstrip("/") != "/sync":
+            self.send_text(404, "Not found")
+            return
+
+        watchlist_urls = [url.strip() for url in parse_qs(parts.query).get("url", []) if url.strip()]
+        # Only the configured watchlists can be targeted
+        configured_urls = get_sync_watchlist_urls()
+        unknown_urls = [url for url in watchlist_urls if url not in configured_urls]
+        if unknown_urls:
+            self.send_text(400, f"Unknown watchlist: {', '.join(unknown_urls)}")
+            return
+
+        for watchlist_url in watchlist_urls or [None]:
+            request_sync(watchlist_url)
+        self.send_text(202, f"Sync requested for {', '.join(watchlist_urls) if watchlist_urls else 'all watchlists'}")
+
+    def log_message(self, format, *args):
+        print(f"Trigger endpoint: {self.address_string()} - {format % args}")
+
+# Serve the trigger endpoint in a background thread
+def start_trigger_server(host, port):
+    server = ThreadingHTTPServer((host, port), TriggerHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Trigger endpoint listening on http://{host}:{port}/sync")
+    return server
+
 interval = int(os.environ.get('INTERVAL_MINUTES', 1440))
-schedule.every(interval).minutes.do(run_sickadd)
 
-# Run SickAdd.py immediately
-run_sickadd()
+# With adaptive polling, SickAdd is run often enough to poll the most active watchlists, each run only polls the due ones
+if is_enabled(os.environ.get('ADAPTIVE_POLLING', 'false')):
+    interval = max(1, min(interval, int(float(os.environ.get('WATCHLIST_POLL_MIN_MINUTES', 60)))))
+
+if is_enabled(os.environ.get('DAEMON_MODE', 'false')):
+    setup_sickadd_daemon()
+    run_job = run_sickadd_daemon
+else:
+    run_job = run_sickadd
+
+schedule.every(interval).minutes.do(run_job)
+
+if os.environ.get('TRIGGER_PORT'):
+    start_trigger_server(os.environ.get('TRIGGER_HOST', '127.0.0.1'), int(os.environ['TRIGGER_PORT']))
+
+# Run SickAdd immediately
+run_job()
 
+# Wake up for the scheduled runs, and as soon as a triggered sync is due
 while True:
+    trigger_event.clear()
     schedule.run_pending()
-    time.sleep(60)
+    run_triggered_sync()
+    delay = get_trigger_delay()
+    trigger_event.wait(60 if delay is None else min(60, max(delay, 1)))
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import SickAdd
+
+
+# Streamed response of a title page, with the attributes used by SickAdd
+class FakeTitleResponse:
+    def __init__(self, url, status_code, text=""):
+        self.url = url
+        self.status_code = status_code
+        self.content = text.encode("utf-8")
+        self.encoding = "utf-8"
+        self.headers = {}
+
+    def iter_content(self, chunk_size=1):
+        for offset in range(0, len(self.content), chunk_size):
+            yield self.content[offset:offset + chunk_size]
+
+    def close(self):
+        pass
+
+
+class ClassifyImdbIdsTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(SickAdd.settings, {"debug": 0, "imdb_workers": 2})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Imports requests, as the first request of a run does
+        SickAdd.get_http_session()
+        self.status_codes = {}
+
+        def http_get(url, headers=None, **kwargs):
+            imdb_id = url.rstrip("/").rsplit("/", 1)[-1]
+            status_code = self.status_codes.get(imdb_id, 200)
+            return FakeTitleResponse(url, status_code, f"<html><head><title>Title {imdb_id} (TV Series 2008-2013) - IMDb</title></head></html>")
+        patcher = mock.patch.object(SickAdd, "http_get", http_get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_server_errors_are_not_classified(self):
+        self.status_codes.update(tt0000502=502, tt0000504=504, tt0000404=404)
+        stored = {}
+        classifications = SickAdd.classify_imdb_ids(["tt0903747", "tt0000502", "tt0000504", "tt0000404"], stored.__setitem__)
+
+        self.assertEqual(classifications, {
+            "tt0903747": (True, "Title tt0903747 (TV Series 2008-2013) - IMDb"),
+            "tt0000404": (False, ""),
+        })
+        self.assertEqual(stored, classifications)
+
+    def test_server_error_keeps_watchlist_due(self):
+        self.status_codes["tt0903747"] = 502
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        cur = conn.cursor()
+        SickAdd.upgrade_database(conn, cur)
+        url = "https://www.imdb.com/list/ls000000001/"
+        SickAdd.watchlist_cache_updates[url] = (None, None, "hash")
+        self.addCleanup(SickAdd.watchlist_cache_updates.clear)
+
+        series_list, unknown_list = SickAdd.imdb_watchlists_init(cur, [(url, [{"imdb_id": "tt0903747", "title": None, "title_type": None}])])
+
+        self.assertEqual((series_list, unknown_list), ([], []))
+        cur.execute("SELECT COUNT(*) FROM shows")
+        self.assertEqual(cur.fetchone()[0], 0)
+        self.assertNotIn(url, SickAdd.watchlist_cache_updates)
+
+
+if __name__ == "__main__":
+    unittest.main()
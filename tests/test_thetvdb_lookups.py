@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import SickAdd
+
+
+# Response of a TheTVDB lookup, with the attributes used by SickAdd
+class FakeResponse:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+
+
+class GetThetvdbIdsTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(SickAdd.settings, {"debug": 0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Imports requests, as the first request of a run does
+        SickAdd.get_http_session()
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        self.cur = self.conn.cursor()
+        SickAdd.upgrade_database(self.conn, self.cur)
+        self.cur.executemany(
+            "INSERT INTO shows (imdb_id, title, watchlist_url, imdb_import_date, added_to_sickchill, show_type) VALUES (?, ?, '', '2026-01-01', 0, 1)",
+            [(imdb_id, f"Title {imdb_id}") for imdb_id in ("tt0000200", "tt0000404", "tt0000502", "tt0000999")],
+        )
+        self.conn.commit()
+
+    def test_unavailable_thetvdb_doesnt_count_as_attempt(self):
+        def http_get(url, headers=None, **kwargs):
+            imdb_id = url.rsplit("=", 1)[-1]
+            if imdb_id == "tt0000200":
+                return FakeResponse(200, b'<?xml version="1.0" encoding="UTF-8" ?><Data><Series><id>81189</id></Series></Data>')
+            if imdb_id == "tt0000404":
+                return FakeResponse(404)
+            if imdb_id == "tt0000502":
+                return FakeResponse(502)
+            raise SickAdd.requests.exceptions.ConnectionError(f"Connection refused: {url}")
+
+        with mock.patch.object(SickAdd, "http_get", http_get):
+            SickAdd.get_thetvdb_ids(self.conn, self.cur)
+
+        self.cur.execute("SELECT imdb_id, thetvdb_id, tvdb_attempts, tvdb_last_outcome FROM shows ORDER BY imdb_id")
+        self.assertEqual(self.cur.fetchall(), [
+            ("tt0000200", 81189, 1, "found"),
+            ("tt0000404", None, 1, "http_404"),
+            ("tt0000502", None, 0, None),
+            ("tt0000999", None, 0, None),
+        ])
+        self.assertEqual([imdb_id for imdb_id, title in SickAdd.get_thetvdb_lookups_due(self.cur)], ["tt0000502", "tt0000999"])
+
+
+if __name__ == "__main__":
+    unittest.main()
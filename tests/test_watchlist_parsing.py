@@ -0,0 +1,225 @@
+import os
+import sqlite3
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import SickAdd
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+WATCHLIST_URL = "https://www.imdb.com/list/ls000000001/"
+PAGE_2_URL = "https://www.imdb.com/list/ls000000001/?sort=list_order%2Casc&page=2"
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_PATH, name), encoding="utf-8") as fixture_file:
+        return fixture_file.read()
+
+
+# Response of a watchlist page, with the attributes used by SickAdd
+class FakeResponse:
+    def __init__(self, text, status_code=200, headers=None):
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class WatchlistTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(SickAdd.settings, {"debug": 0, "watchlist_max_pages": 100})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.requested_urls = []
+        SickAdd.watchlist_stats.clear()
+        SickAdd.watchlist_cache_updates.clear()
+        SickAdd.watchlist_polls.clear()
+        SickAdd.run_responses.clear()
+
+    # Serve the given pages by URL instead of fetching them, other URLs get a 404 response
+    def serve_pages(self, pages):
+        def http_get(url, headers=None, **kwargs):
+            self.requested_urls.append(url)
+            return FakeResponse(pages[url]) if url in pages else FakeResponse("", 404)
+        patcher = mock.patch.object(SickAdd, "http_get", http_get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def iter_items(self, url, first_page):
+        return [page_items for page_items in SickAdd.iter_watchlist_pages(url, FakeResponse(first_page))]
+
+
+class ParseWatchlistPageTest(WatchlistTestCase):
+    def test_json_ld_items(self):
+        items, next_page_url, total_items = SickAdd.parse_watchlist_page(WATCHLIST_URL, read_fixture("watchlist_jsonld_page1.html"))
+        self.assertEqual(items, [
+            {"imdb_id": "tt0903747", "title": "Breaking Bad", "title_type": "series"},
+            {"imdb_id": "tt0111161", "title": "The Shawshank Redemption", "title_type": "other"},
+            {"imdb_id": "tt0185906", "title": None, "title_type": "series"},
+        ])
+        self.assertEqual(next_page_url, PAGE_2_URL)
+        self.assertEqual(total_items, 4)
+
+    def test_last_page_has_no_next_page(self):
+        items, next_page_url, total_items = SickAdd.parse_watchlist_page(PAGE_2_URL, read_fixture("watchlist_jsonld_page2.html"))
+        self.assertEqual([item["imdb_id"] for item in items], ["tt0185906", "tt0306414"])
+        self.assertIsNone(next_page_url)
+        self.assertEqual(total_items, 4)
+
+    def test_html_fallback(self):
+        url = "https://www.imdb.com/list/ls000000002/"
+        items, next_page_url, total_items = SickAdd.parse_watchlist_page(url, read_fixture("watchlist_legacy.html"))
+        # Only the first title link of each list item is kept, their type is unknown
+        self.assertEqual(items, [
+            {"imdb_id": "tt0141842", "title": None, "title_type": None},
+            {"imdb_id": "tt0068646", "title": None, "title_type": None},
+        ])
+        self.assertEqual(next_page_url, "https://www.imdb.com/list/ls000000002/?page=2")
+        self.assertIsNone(total_items)
+
+
+class IterWatchlistPagesTest(WatchlistTestCase):
+    def test_next_page_link(self):
+        self.serve_pages({PAGE_2_URL: read_fixture("watchlist_jsonld_page2.html")})
+        pages = self.iter_items(WATCHLIST_URL, read_fixture("watchlist_jsonld_page1.html"))
+
+        # The item repeated on the second page is only yielded once
+        self.assertEqual([[item["imdb_id"] for item in items] for items in pages], [
+            ["tt0903747", "tt0111161", "tt0185906"],
+            ["tt0306414"],
+        ])
+        self.assertEqual(self.requested_urls, [PAGE_2_URL])
+        stats = SickAdd.watchlist_stats[WATCHLIST_URL]
+        self.assertEqual((stats["pages"], stats["requests"], stats["items"], stats["typed_items"]), (2, 2, 4, 4))
+        self.assertIsNotNone(SickAdd.watchlist_polls[WATCHLIST_URL])
+
+    def test_previous_page_ids_only(self):
+        self.serve_pages({PAGE_2_URL: read_fixture("watchlist_jsonld_page2.html")})
+        pages = self.iter_items(WATCHLIST_URL, read_fixture("watchlist_jsonld_page1.html"))
+        fingerprint = SickAdd.watchlist_polls[WATCHLIST_URL]
+
+        SickAdd.watchlist_polls.clear()
+        pages_read = [page_items for page_items in SickAdd.iter_watchlist_pages(WATCHLIST_URL, FakeResponse(read_fixture("watchlist_jsonld_page1.html")), keep_seen_ids=False)]
+        self.assertEqual(pages_read, pages)
+        self.assertEqual(SickAdd.watchlist_polls[WATCHLIST_URL], fingerprint)
+
+    def test_number_of_items_pagination(self):
+        first_page = read_fixture("watchlist_jsonld_page1.html").replace(' rel="next"', "")
+        page_2_url = WATCHLIST_URL + "?page=2"
+        self.serve_pages({page_2_url: read_fixture("watchlist_jsonld_page2.html")})
+        pages = self.iter_items(WATCHLIST_URL, first_page)
+
+        self.assertEqual(self.requested_urls, [page_2_url])
+        self.assertEqual(sum(len(items) for items in pages), 4)
+
+    def test_page_without_new_items_stops(self):
+        page_2 = read_fixture("watchlist_jsonld_page1.html").replace("&amp;page=2", "&amp;page=3")
+        self.serve_pages({PAGE_2_URL: page_2})
+        pages = self.iter_items(WATCHLIST_URL, read_fixture("watchlist_jsonld_page1.html"))
+
+        self.assertEqual([len(items) for items in pages], [3, 0])
+        self.assertEqual(self.requested_urls, [PAGE_2_URL])
+
+    def test_failed_page_keeps_watchlist_due(self):
+        self.serve_pages({})
+        SickAdd.watchlist_cache_updates[WATCHLIST_URL] = (None, None, "hash")
+        pages = self.iter_items(WATCHLIST_URL, read_fixture("watchlist_jsonld_page1.html"))
+
+        self.assertEqual([len(items) for items in pages], [3])
+        self.assertNotIn(WATCHLIST_URL, SickAdd.watchlist_cache_updates)
+        self.assertNotIn(WATCHLIST_URL, SickAdd.watchlist_polls)
+
+
+class UnreachableWatchlistTest(WatchlistTestCase):
+    def test_unreachable_watchlist_is_skipped(self):
+        SickAdd.get_http_session()
+        unreachable_url = "https://unreachable.example/list/ls000000009/"
+        pages = {WATCHLIST_URL: read_fixture("watchlist_jsonld_page1.html"), PAGE_2_URL: read_fixture("watchlist_jsonld_page2.html")}
+
+        def http_get(url, headers=None, **kwargs):
+            if url == unreachable_url:
+                raise SickAdd.requests.exceptions.ConnectionError(f"Connection refused: {url}")
+            return FakeResponse(pages[url])
+
+        with mock.patch.object(SickAdd, "http_get", http_get), mock.patch.dict(SickAdd.settings, {"watchlist_urls": [unreachable_url, WATCHLIST_URL]}):
+            SickAdd.check_watchlists()
+            self.assertEqual(list(SickAdd.run_responses), [WATCHLIST_URL])
+            self.assertEqual(SickAdd.get_imdb_watchlists(unreachable_url), [])
+            self.assertEqual(len(SickAdd.get_imdb_watchlists(WATCHLIST_URL)), 4)
+
+
+class PipelineInterruptTest(WatchlistTestCase):
+    def test_interrupted_watchlist_isnt_cached(self):
+        SickAdd.get_http_session()
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        cur = conn.cursor()
+        SickAdd.upgrade_database(conn, cur)
+
+        def http_get(url, headers=None, **kwargs):
+            if url == WATCHLIST_URL:
+                return FakeResponse(read_fixture("watchlist_jsonld_page1.html"), headers={"ETag": '"v1"'})
+            if url == PAGE_2_URL:
+                raise KeyboardInterrupt
+            raise SickAdd.requests.exceptions.ConnectionError(f"Connection refused: {url}")
+
+        with mock.patch.object(SickAdd, "http_get", http_get), mock.patch.object(SickAdd, "get_sickchill_shows", lambda refresh=False: set()), \
+                mock.patch.dict(SickAdd.settings, {"watchlist_urls": [WATCHLIST_URL]}):
+            with self.assertRaises(KeyboardInterrupt):
+                SickAdd.run_pipeline(conn, cur)
+
+        # The items of the first page are kept, the watchlist is fetched without validators on the next run
+        cur.execute("SELECT imdb_id FROM shows ORDER BY imdb_id")
+        self.assertEqual([row[0] for row in cur.fetchall()], ["tt0111161", "tt0185906", "tt0903747"])
+        cur.execute("SELECT COUNT(*) FROM watchlist_cache")
+        self.assertEqual(cur.fetchone()[0], 0)
+
+
+class ImdbWatchlistsInitTest(WatchlistTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        self.cur = self.conn.cursor()
+        SickAdd.upgrade_database(self.conn, self.cur)
+
+    def test_watchlist_cache_follows_imdb_ids(self):
+        pages = {WATCHLIST_URL: read_fixture("watchlist_jsonld_page1.html"), PAGE_2_URL: read_fixture("watchlist_jsonld_page2.html")}
+        self.serve_pages(pages)
+        self.assertEqual(len(SickAdd.get_imdb_watchlists(WATCHLIST_URL, self.cur)), 4)
+        SickAdd.save_watchlist_cache(self.conn, self.cur)
+
+        # Only the markup of the pages changed
+        pages[WATCHLIST_URL] = pages[WATCHLIST_URL].replace('data-session="f3b2c9a1"', 'data-session="0c9e4d27"')
+        self.assertEqual(SickAdd.get_imdb_watchlists(WATCHLIST_URL, self.cur), [])
+        SickAdd.save_watchlist_cache(self.conn, self.cur)
+
+        # An item added to the second page changes the watchlist, even though the first page is the same
+        pages[PAGE_2_URL] = pages[PAGE_2_URL].replace("tt0306414", "tt0475784")
+        self.assertEqual(len(SickAdd.get_imdb_watchlists(WATCHLIST_URL, self.cur)), 4)
+
+    def test_typed_items_of_several_watchlists(self):
+        self.serve_pages({PAGE_2_URL: read_fixture("watchlist_jsonld_page2.html")})
+        items = [item for page_items in self.iter_items(WATCHLIST_URL, read_fixture("watchlist_jsonld_page1.html")) for item in page_items]
+        other_url = "https://www.imdb.com/list/ls000000003/"
+
+        logged = []
+        with mock.patch.object(SickAdd, "debug_log", lambda message, *args, **kwargs: logged.append((message, args))):
+            series_list, unknown_list = SickAdd.imdb_watchlists_init(self.cur, [(WATCHLIST_URL, items), (other_url, items)])
+
+        self.assertEqual({series["imdb_id"]: series["title"] for series in series_list}, {
+            "tt0903747": "Breaking Bad",
+            "tt0185906": "Unknown IMDB Title",
+            "tt0306414": "The Wire",
+        })
+        self.assertEqual([unknown["imdb_id"] for unknown in unknown_list], ["tt0111161"])
+        # The series of the second watchlist are counted as series, only the movie is ignored
+        self.assertEqual([args for message, args in logged if message == "  Series items: %s"], [(3,), (3,)])
+        self.assertEqual([args for message, args in logged if message == "  Ignored items: %s"], [(1,), (1,)])
+
+
+if __name__ == "__main__":
+    unittest.main()